@@ -0,0 +1,90 @@
+import functools
+import inspect
+import json
+import logging
+from typing import Callable, Tuple
+
+import redis.asyncio as redis
+from pydantic import BaseModel
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Shared async Redis client; connections are pooled per process
+redis_client = redis.Redis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    password=settings.REDIS_PASSWORD
+)
+
+def _cache_key(namespace: str, args: tuple, kwargs: dict) -> str:
+    parts = [namespace, *map(str, args)]
+    parts.extend(f"{key}={value}" for key, value in sorted(kwargs.items()))
+    return ":".join(parts)
+
+def cached(namespace: str, ttl: int = 60, ignore: Tuple[str, ...] = ()) -> Callable:
+    """Memoize an async service method in Redis for ``ttl`` seconds.
+
+    The key is the namespace plus the call arguments (excluding ``self`` and
+    any parameter named in ``ignore``, e.g. a request-scoped ``db`` session).
+    Pydantic return values are stored as JSON and rebuilt from the method's
+    return annotation; anything else must be JSON-serialisable. Redis errors
+    are logged and the call falls through to the wrapped method.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        return_type = signature.return_annotation
+        is_model = inspect.isclass(return_type) and issubclass(return_type, BaseModel)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if ignore:
+                bound = signature.bind(self, *args, **kwargs).arguments
+                key_args = tuple(
+                    value for name, value in bound.items()
+                    if name != "self" and name not in ignore
+                )
+                key = _cache_key(namespace, key_args, {})
+            else:
+                key = _cache_key(namespace, args, kwargs)
+            try:
+                hit = await redis_client.get(key)
+            except redis.RedisError as e:
+                logger.warning(f"Cache read failed for {key}: {str(e)}")
+                hit = None
+            if hit is not None:
+                return return_type.model_validate_json(hit) if is_model else json.loads(hit)
+
+            value = await func(self, *args, **kwargs)
+            payload = value.model_dump_json() if is_model else json.dumps(value, default=str)
+            try:
+                await redis_client.setex(key, ttl, payload)
+            except redis.RedisError as e:
+                logger.warning(f"Cache write failed for {key}: {str(e)}")
+            return value
+
+        return wrapper
+    return decorator
+
+async def invalidate_key(namespace: str, *args) -> None:
+    """Drop the single cached entry for a call with these key arguments.
+
+    ``args`` are the arguments that make up the key, i.e. the call's
+    positional arguments without ``self`` or any ignored parameter.
+    """
+    key = _cache_key(namespace, args, {})
+    try:
+        await redis_client.unlink(key)
+    except redis.RedisError as e:
+        logger.warning(f"Cache invalidation failed for {key}: {str(e)}")
+
+async def invalidate(*namespaces: str) -> None:
+    """Drop every cached entry under the given namespaces."""
+    try:
+        for namespace in namespaces:
+            keys = [key async for key in redis_client.scan_iter(match=f"{namespace}*")]
+            if keys:
+                await redis_client.unlink(*keys)
+    except redis.RedisError as e:
+        logger.warning(f"Cache invalidation failed for {namespaces}: {str(e)}")
@@ -77,6 +77,10 @@ class Settings(BaseSettings):
     ENABLE_ANALYTICS: bool = True
     ANALYTICS_DB_URL: Optional[str] = None
     
+    # Chatbot settings: staff account that owns chatbot conversation
+    # notifications; conversations are not recorded while unset
+    CHATBOT_NOTIFICATION_USER_ID: Optional[int] = None
+    
     class Config:
         case_sensitive = True
         env_file = ".env"
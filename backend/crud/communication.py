@@ -109,6 +109,18 @@ def mark_message_sent(db: Session, message_id: int) -> Optional[Message]:
         db.refresh(db_message)
     return db_message
 
+def mark_messages_sent(db: Session, message_ids: List[int]) -> int:
+    if not message_ids:
+        return 0
+    updated = db.query(Message)\
+        .filter(Message.id.in_(message_ids))\
+        .update(
+            {Message.status: MessageStatus.SENT, Message.sent_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+    db.commit()
+    return updated
+
 def mark_message_delivered(db: Session, message_id: int) -> Optional[Message]:
     db_message = get_message(db, message_id)
     if db_message:
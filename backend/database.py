@@ -1,19 +1,70 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import orjson
 from .config import settings
 
+
+def _json_serializer(value) -> str:
+    """Serialize JSON column values with orjson instead of the stdlib json."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
     pool_size=5,
-    max_overflow=10
+    max_overflow=10,
+    json_serializer=_json_serializer
 )
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def commit_keep_loaded(db: Session) -> None:
+    """Commit without expiring the session's loaded objects.
+
+    For creators that return the row they just inserted: its id comes back
+    from the INSERT and its other defaults are set in Python, so reloading
+    it after commit would only repeat what is already in memory. The session
+    keeps expiring on commit everywhere else.
+    """
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
+# Async engine for services whose methods await the database, using the
+# asyncio driver for the configured backend
+async_database_url = make_url(
+    settings.database_url
+    .replace("postgresql://", "postgresql+asyncpg://", 1)
+    .replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
+
+# aiosqlite's default pool takes no sizing arguments
+async_pool_options = (
+    {} if async_database_url.get_backend_name() == "sqlite"
+    else {"pool_size": 20, "max_overflow": 10}
+)
+
+async_engine = create_async_engine(
+    async_database_url,
+    pool_pre_ping=True,
+    json_serializer=_json_serializer,
+    **async_pool_options
+)
+
+# Objects stay loaded after commit so they can be returned without a
+# lazy refresh, which async sessions cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 # Create Base class
 Base = declarative_base()
 
@@ -25,6 +76,11 @@ def get_db():
     finally:
         db.close()
 
+# Dependency to get async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Create all tables
 def create_tables():
     Base.metadata.create_all(bind=engine) 
\ No newline at end of file
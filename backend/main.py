@@ -1,3 +1,13 @@
+import os
+
+# Skip pydantic-core's self-check of every generated core schema at import
+# time. The schemas are plain model declarations exercised at build time, so
+# re-validating them on every cold start only slows down boot. Must be set
+# before any schema module is imported. pydantic only checks that the
+# variable is present, so any value, even "0" or "false", enables skipping;
+# unset it to restore validation.
+os.environ.setdefault("PYDANTIC_SKIP_VALIDATING_CORE_SCHEMAS", "1")
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .routers import (
@@ -20,6 +30,9 @@ from .database import create_tables, engine, Base
 from .config import settings
 from .services.task_processor import start_task_processor
 from .services.sync_service import sync_service
+from .services.communication import communication_service
+from .services.biometric import biometric_service
+from .services.chatbot import flush_pending_notifications
 import asyncio
 
 # Create FastAPI app
@@ -131,4 +144,9 @@ def health_check():
 @app.on_event("shutdown")
 async def shutdown_event():
     # Stop the sync service
-    await sync_service.stop() 
\ No newline at end of file
+    await sync_service.stop()
+    # Write chatbot notification rows still waiting for a batch
+    await flush_pending_notifications()
+    # Close pooled provider connections
+    await communication_service.aclose()
+    await biometric_service.aclose() 
\ No newline at end of file
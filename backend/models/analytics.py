@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Table, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Table, Float, Index, DDL, event, table, column
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 import enum
 from .base import BaseModel
@@ -49,7 +49,7 @@ class Report(Base):
     description = Column(String)
     generated_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     parameters = Column(JSON)  # Report generation parameters
-    data = Column(JSON)  # Report data
+    data = deferred(Column(JSON))  # Report data, loaded only on access
     format = Column(String, default="json")  # json, csv, pdf
     status = Column(String, default="completed")  # pending, processing, completed, failed
     error_message = Column(String)
@@ -59,6 +59,11 @@ class Report(Base):
     # Relationships
     generator = relationship("User", back_populates="generated_reports")
 
+    __table_args__ = (
+        # Covers the per-user report stats GROUP BY
+        Index("ix_reports_generated_by_type_status", "generated_by", "report_type", "status"),
+    )
+
 class Metric(Base):
     """Model for tracking various metrics"""
     __tablename__ = "metrics"
@@ -99,7 +104,7 @@ class Widget(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     dashboard_id = Column(Integer, ForeignKey("dashboards.id"), nullable=False)
-    widget_type = Column(String, nullable=False)  # chart, table, metric, etc.
+    widget_type = Column(String, nullable=False, index=True)  # chart, table, metric, etc.
     title = Column(String, nullable=False)
     description = Column(String)
     configuration = Column(JSON)  # Widget-specific configuration
@@ -208,4 +213,93 @@ class FacilityPerformanceMetrics(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    facility = relationship("Facility", back_populates="performance_metrics") 
\ No newline at end of file
+    facility = relationship("Facility", back_populates="performance_metrics")
+
+# Per-facility daily roll-up of the metrics behind IncentiveService's
+# calculators, read on PostgreSQL instead of scanning the three fact tables for
+# every payout. Satisfaction is kept as a sum and a count so averages over a
+# period stay exact. The task processor refreshes it nightly; refreshed_at
+# records when, and the service only reads days that had ended by then,
+# taking everything newer from the metric tables.
+FACILITY_DAILY_INCENTIVE_VIEW = "mv_facility_daily_incentive"
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS {FACILITY_DAILY_INCENTIVE_VIEW} AS
+        WITH performance AS (
+            SELECT facility_id,
+                   date_trunc('day', date) AS day,
+                   count(*) AS performance_rows,
+                   coalesce(sum(total_appointments), 0) AS total_appointments,
+                   coalesce(sum(completed_appointments), 0) AS completed_appointments
+            FROM facility_performance_metrics
+            GROUP BY 1, 2
+        ), engagement AS (
+            SELECT facility_id,
+                   date_trunc('day', date) AS day,
+                   count(*) AS engagement_rows,
+                   coalesce(sum(patient_satisfaction_score), 0) AS satisfaction_sum,
+                   count(patient_satisfaction_score) AS satisfaction_count
+            FROM patient_engagement_metrics
+            GROUP BY 1, 2
+        ), claims AS (
+            SELECT facility_id,
+                   date_trunc('day', date) AS day,
+                   count(*) AS claim_rows,
+                   coalesce(sum(total_claims), 0) AS total_claims,
+                   coalesce(sum(approved_claims), 0) AS approved_claims
+            FROM nhif_claim_metrics
+            GROUP BY 1, 2
+        )
+        SELECT coalesce(p.facility_id, e.facility_id, c.facility_id) AS facility_id,
+               coalesce(p.day, e.day, c.day) AS day,
+               coalesce(p.performance_rows, 0) AS performance_rows,
+               coalesce(p.total_appointments, 0) AS total_appointments,
+               coalesce(p.completed_appointments, 0) AS completed_appointments,
+               coalesce(e.engagement_rows, 0) AS engagement_rows,
+               coalesce(e.satisfaction_sum, 0) AS satisfaction_sum,
+               coalesce(e.satisfaction_count, 0) AS satisfaction_count,
+               coalesce(c.claim_rows, 0) AS claim_rows,
+               coalesce(c.total_claims, 0) AS total_claims,
+               coalesce(c.approved_claims, 0) AS approved_claims,
+               timezone('UTC', now()) AS refreshed_at
+        FROM performance p
+        FULL JOIN engagement e
+            ON e.facility_id = p.facility_id AND e.day = p.day
+        FULL JOIN claims c
+            ON c.facility_id = coalesce(p.facility_id, e.facility_id)
+           AND c.day = coalesce(p.day, e.day)
+    """).execute_if(dialect="postgresql")
+)
+# A unique index lets the view be refreshed CONCURRENTLY
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{FACILITY_DAILY_INCENTIVE_VIEW} "
+        f"ON {FACILITY_DAILY_INCENTIVE_VIEW} (facility_id, day)"
+    ).execute_if(dialect="postgresql")
+)
+event.listen(
+    Base.metadata,
+    "before_drop",
+    DDL(f"DROP MATERIALIZED VIEW IF EXISTS {FACILITY_DAILY_INCENTIVE_VIEW}").execute_if(dialect="postgresql")
+)
+
+facility_daily_incentive = table(
+    FACILITY_DAILY_INCENTIVE_VIEW,
+    column("facility_id", Integer),
+    column("day", DateTime),
+    column("performance_rows", Integer),
+    column("total_appointments", Integer),
+    column("completed_appointments", Integer),
+    column("engagement_rows", Integer),
+    column("satisfaction_sum", Float),
+    column("satisfaction_count", Integer),
+    column("claim_rows", Integer),
+    column("total_claims", Integer),
+    column("approved_claims", Integer),
+    column("refreshed_at", DateTime)
+)
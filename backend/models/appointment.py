@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime
@@ -21,6 +21,9 @@ class AppointmentStatus(enum.Enum):
 
 class Appointment(Base, BaseModel):
     """Appointment model for scheduling and tracking patient visits"""
+    __table_args__ = (
+        Index("ix_appointment_doctor_status_scheduled", "doctor_id", "status", "scheduled_at"),
+    )
     
     # Basic Information
     patient_id = Column(ForeignKey("patient.id"), nullable=False)
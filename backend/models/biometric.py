@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 
 from ..database import Base
@@ -11,7 +11,8 @@ class BiometricRecord(Base):
     patient_id = Column(Integer, ForeignKey("patients.id"))
     nhif_id = Column(String, unique=True, index=True, nullable=True)
     biometric_type = Column(String)  # fingerprint, facial, etc.
-    biometric_data = Column(LargeBinary)
+    biometric_data = deferred(Column(LargeBinary))  # Raw template, loaded only on access
+    biometric_hash = Column(LargeBinary(32), index=True)  # SHA-256 of biometric_data
     provider = Column(String)  # NHIF, custom, etc.
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -37,5 +37,12 @@ class CalendarEvent(Base):
     appointment = relationship("Appointment", back_populates="calendar_events")
     follow_up = relationship("FollowUpSchedule", back_populates="calendar_events")
 
+    __table_args__ = (
+        # Filtered, time-ordered listing in get_events
+        Index("ix_calendar_events_type_start", "event_type", "start_time"),
+        # Compact index for unfiltered time range scans on PostgreSQL
+        Index("ix_calendar_events_start_brin", "start_time", postgresql_using="brin"),
+    )
+
     def __repr__(self):
         return f"<CalendarEvent {self.id} - {self.title}>" 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -55,6 +55,12 @@ class CHW(Base, BaseModel):
 class CHWVisit(Base):
     """Model for tracking CHW field visits"""
     __tablename__ = "chw_visits"
+    __table_args__ = (
+        Index("ix_chw_visits_chw_scheduled", "chw_id", "scheduled_date"),
+        Index("ix_chw_visits_chw_status_scheduled", "chw_id", "status", "scheduled_date"),
+        Index("ix_chw_visits_patient_scheduled", "patient_id", "scheduled_date"),
+        Index("ix_chw_visits_status_scheduled", "status", "scheduled_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     chw_id = Column(Integer, ForeignKey("chws.id"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Enum, Boolean, DDL, event, table, column, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -24,6 +24,10 @@ class ActivityType(str, enum.Enum):
 class CHWFieldVisit(Base):
     """Model for tracking CHW field visits"""
     __tablename__ = "chw_field_visits"
+    __table_args__ = (
+        # Serves the per-CHW filters and the visit_date DESC ordering
+        Index("ix_chw_field_visits_chw_visit_date", "chw_id", "visit_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     chw_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -46,6 +50,166 @@ class CHWFieldVisit(Base):
     activities = relationship("CHWActivity", back_populates="visit")
     location_tracking = relationship("CHWLocationTracking", back_populates="visit")
 
+# Daily roll-up of field visits read by CHWTrackerService.get_visit_stats on
+# PostgreSQL for date-bounded windows, including each visit's track distance
+# (Haversine between consecutive points of the visit). It is refreshed
+# periodically by the task processor, so figures lag new visits by up to one
+# refresh interval. It reads chw_location_tracking too, so it is created once
+# all tables exist.
+CHW_DAILY_VISIT_STATS_VIEW = "mv_chw_daily_visit_stats"
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS {CHW_DAILY_VISIT_STATS_VIEW} AS
+        WITH legs AS (
+            SELECT visit_id,
+                   latitude,
+                   longitude,
+                   lag(latitude) OVER w AS prev_lat,
+                   lag(longitude) OVER w AS prev_lon
+            FROM chw_location_tracking
+            WINDOW w AS (PARTITION BY visit_id ORDER BY timestamp)
+        ), visit_distance AS (
+            SELECT visit_id,
+                   coalesce(sum(2 * 6371 * asin(sqrt(
+                       power(sin(radians(latitude - prev_lat) / 2), 2)
+                       + cos(radians(prev_lat)) * cos(radians(latitude))
+                       * power(sin(radians(longitude - prev_lon) / 2), 2)
+                   ))), 0) AS distance_km
+            FROM legs
+            GROUP BY visit_id
+        )
+        SELECT v.chw_id,
+               date_trunc('day', v.visit_date) AS day,
+               v.status,
+               v.visit_type,
+               count(*) AS visits,
+               count(v.end_time - v.start_time) AS timed_visits,
+               coalesce(sum(extract(epoch FROM v.end_time - v.start_time) / 60), 0) AS duration_minutes,
+               count(*) FILTER (WHERE v.is_verified) AS verified_visits,
+               coalesce(sum(d.distance_km), 0) AS distance_km
+        FROM chw_field_visits v
+        LEFT JOIN visit_distance d ON d.visit_id = v.id
+        GROUP BY 1, 2, 3, 4
+    """).execute_if(dialect="postgresql")
+)
+# A unique index lets the view be refreshed CONCURRENTLY
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{CHW_DAILY_VISIT_STATS_VIEW} "
+        f"ON {CHW_DAILY_VISIT_STATS_VIEW} (chw_id, day, status, visit_type)"
+    ).execute_if(dialect="postgresql")
+)
+event.listen(
+    Base.metadata,
+    "before_drop",
+    DDL(f"DROP MATERIALIZED VIEW IF EXISTS {CHW_DAILY_VISIT_STATS_VIEW}").execute_if(dialect="postgresql")
+)
+
+chw_daily_visit_stats = table(
+    CHW_DAILY_VISIT_STATS_VIEW,
+    column("chw_id", Integer),
+    column("day", DateTime),
+    column("status", Enum(VisitStatus)),
+    column("visit_type", Enum(ActivityType)),
+    column("visits", Integer),
+    column("timed_visits", Integer),
+    column("duration_minutes", Float),
+    column("verified_visits", Integer),
+    column("distance_km", Float)
+)
+
+# Exact all-time per-CHW visit totals, kept current on PostgreSQL by a row
+# trigger on chw_field_visits. Each insert, delete or relevant update
+# subtracts the old row's contribution and adds the new one, so unbounded
+# get_visit_stats reads a single row with no refresh lag.
+CHW_STATS_SUMMARY_TABLE = "chw_stats_summary"
+
+_CHW_STATS_SUMMARY_DELTA = """
+    INSERT INTO {table} AS s (chw_id, total_visits, verified_visits, completed_visits, total_duration_min)
+    VALUES (
+        {row}.chw_id,
+        {sign}1,
+        {sign}(CASE WHEN {row}.is_verified THEN 1 ELSE 0 END),
+        {sign}(CASE WHEN {row}.end_time - {row}.start_time IS NOT NULL THEN 1 ELSE 0 END),
+        {sign}coalesce(extract(epoch FROM {row}.end_time - {row}.start_time) / 60, 0)
+    )
+    ON CONFLICT (chw_id) DO UPDATE SET
+        total_visits = s.total_visits + EXCLUDED.total_visits,
+        verified_visits = s.verified_visits + EXCLUDED.verified_visits,
+        completed_visits = s.completed_visits + EXCLUDED.completed_visits,
+        total_duration_min = s.total_duration_min + EXCLUDED.total_duration_min;
+"""
+
+for statement in (
+    f"""
+        CREATE TABLE IF NOT EXISTS {CHW_STATS_SUMMARY_TABLE} (
+            chw_id INTEGER PRIMARY KEY,
+            total_visits BIGINT NOT NULL DEFAULT 0,
+            verified_visits BIGINT NOT NULL DEFAULT 0,
+            completed_visits BIGINT NOT NULL DEFAULT 0,
+            total_duration_min DOUBLE PRECISION NOT NULL DEFAULT 0
+        )
+    """,
+    f"""
+        INSERT INTO {CHW_STATS_SUMMARY_TABLE}
+        SELECT chw_id,
+               count(*),
+               count(*) FILTER (WHERE is_verified),
+               count(end_time - start_time),
+               coalesce(sum(extract(epoch FROM end_time - start_time) / 60), 0)
+        FROM chw_field_visits
+        GROUP BY chw_id
+        ON CONFLICT (chw_id) DO NOTHING
+    """,
+    f"""
+        CREATE OR REPLACE FUNCTION {CHW_STATS_SUMMARY_TABLE}_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                {_CHW_STATS_SUMMARY_DELTA.format(table=CHW_STATS_SUMMARY_TABLE, row="OLD", sign="-")}
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                {_CHW_STATS_SUMMARY_DELTA.format(table=CHW_STATS_SUMMARY_TABLE, row="NEW", sign="")}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """,
+    f"""
+        CREATE TRIGGER trg_{CHW_STATS_SUMMARY_TABLE}
+        AFTER INSERT OR DELETE OR UPDATE OF chw_id, is_verified, start_time, end_time
+        ON chw_field_visits
+        FOR EACH ROW EXECUTE FUNCTION {CHW_STATS_SUMMARY_TABLE}_apply()
+    """
+):
+    event.listen(
+        CHWFieldVisit.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql")
+    )
+for statement in (
+    f"DROP TABLE IF EXISTS {CHW_STATS_SUMMARY_TABLE}",
+    f"DROP FUNCTION IF EXISTS {CHW_STATS_SUMMARY_TABLE}_apply() CASCADE"
+):
+    event.listen(
+        CHWFieldVisit.__table__,
+        "before_drop",
+        DDL(statement).execute_if(dialect="postgresql")
+    )
+
+chw_stats_summary = table(
+    CHW_STATS_SUMMARY_TABLE,
+    column("chw_id", Integer),
+    column("total_visits", Integer),
+    column("verified_visits", Integer),
+    column("completed_visits", Integer),
+    column("total_duration_min", Float)
+)
+
 class CHWActivity(Base):
     """Model for tracking specific activities during field visits"""
     __tablename__ = "chw_activities"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -34,6 +34,10 @@ class DashboardWidget(Base):
 class StaffAvailability(Base):
     """Model for staff availability"""
     __tablename__ = "staff_availability"
+    __table_args__ = (
+        # One schedule row per user and weekday; anchors the availability upsert
+        UniqueConstraint("user_id", "day_of_week", name="uq_staff_availability_user_day"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Index
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql.functions import FunctionElement
+from datetime import datetime, timedelta
 import enum
 
 from ..database import Base
@@ -19,8 +22,34 @@ class FollowUpStatus(str, enum.Enum):
     RESCHEDULED = "rescheduled"
     NO_SHOW = "no_show"
 
+class add_minutes(FunctionElement):
+    """SQL ``timestamp + minutes``, rendered for each supported dialect."""
+    type = DateTime()
+    name = "add_minutes"
+    inherit_cache = True
+
+@compiles(add_minutes)
+def _add_minutes_postgresql(element, compiler, **kw):
+    timestamp, minutes = element.clauses
+    return "(%s + make_interval(mins => %s))" % (
+        compiler.process(timestamp, **kw),
+        compiler.process(minutes, **kw)
+    )
+
+@compiles(add_minutes, "sqlite")
+def _add_minutes_sqlite(element, compiler, **kw):
+    timestamp, minutes = element.clauses
+    return "datetime(%s, '+' || %s || ' minutes')" % (
+        compiler.process(timestamp, **kw),
+        compiler.process(minutes, **kw)
+    )
+
 class FollowUpSchedule(Base):
     __tablename__ = "follow_up_schedules"
+    __table_args__ = (
+        # Serves the daily reminder sweep in FollowUpService.send_follow_up_reminders
+        Index("ix_follow_up_schedules_status_reminder_date", "status", "reminder_sent", "scheduled_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"))
@@ -49,4 +78,22 @@ class FollowUpSchedule(Base):
     # Relationships
     patient = relationship("Patient", back_populates="follow_ups")
     doctor = relationship("User", back_populates="follow_ups")
-    appointments = relationship("Appointment", back_populates="follow_up") 
\ No newline at end of file
+    appointments = relationship("Appointment", back_populates="follow_up")
+
+    @hybrid_property
+    def end_time(self) -> datetime:
+        """When the follow-up slot ends."""
+        return self.scheduled_date + timedelta(minutes=self.duration_minutes)
+
+    @end_time.expression
+    def end_time(cls):
+        return add_minutes(cls.scheduled_date, cls.duration_minutes)
+
+# Turns the slot-overlap checks in FollowUpService into an index range scan
+Index(
+    "ix_follow_up_schedules_doctor_slot",
+    FollowUpSchedule.doctor_id,
+    FollowUpSchedule.status,
+    FollowUpSchedule.scheduled_date,
+    FollowUpSchedule.end_time
+).ddl_if(dialect="postgresql") 
\ No newline at end of file
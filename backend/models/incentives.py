@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -45,6 +45,11 @@ class Reward(Base):
     # Relationships
     chw = relationship("User", back_populates="rewards")
 
+    __table_args__ = (
+        # Covers the per-CHW reward stats GROUP BY
+        Index("ix_rewards_chw_type", "chw_id", "reward_type"),
+    )
+
 class Achievement(Base):
     """Model for tracking CHW achievements"""
     __tablename__ = "achievements"
@@ -189,6 +194,13 @@ class Incentive(Base):
 
 class IncentiveRule(Base):
     __tablename__ = "incentive_rules"
+    __table_args__ = (
+        # Serves IncentiveService rule lookups by facility, type and period
+        Index(
+            "idx_incentive_rule_lookup",
+            "facility_id", "incentive_type", "is_active", "start_date", "end_date"
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     facility_id = Column(Integer, ForeignKey("facilities.id"))
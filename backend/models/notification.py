@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Float, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -54,6 +54,21 @@ class NotificationTemplate(Base):
 class Notification(Base):
     """Model for notifications"""
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Escalation checks filter on these metadata keys
+        Index(
+            "ix_notifications_metadata_type_appointment",
+            text("(metadata->>'type')"),
+            text("(metadata->>'appointment_id')")
+        ).ddl_if(dialect="postgresql"),
+        # Partial index over just the pending emergencies polled by escalation
+        # checks; the Enum column stores member names, hence 'PENDING'
+        Index(
+            "ix_notifications_pending_emergency",
+            text("(metadata->>'type')"),
+            postgresql_where=text("status = 'PENDING' AND (metadata->>'type') = 'emergency'")
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Text, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -33,6 +33,10 @@ class ResponseStatus(str, enum.Enum):
 class PatientResponse(Base):
     """Model for patient responses to reminders"""
     __tablename__ = "patient_responses"
+    __table_args__ = (
+        Index("ix_patient_responses_status", "status"),
+        Index("ix_patient_responses_reminder_status", "reminder_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     reminder_id = Column(Integer, ForeignKey("reminders.id"), nullable=False)
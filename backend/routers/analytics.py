@@ -1,12 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
-from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
-from ..database import get_db
 from ..auth import get_current_active_user
 from ..models.user import User
-from ..services.analytics import analytics_service
+from ..services.analytics import AnalyticsService, get_analytics_service
 from ..schemas.analytics import (
     ReportCreate, ReportUpdate, ReportResponse,
     AnalyticsMetricCreate, AnalyticsMetricUpdate, AnalyticsMetricResponse,
@@ -31,7 +29,7 @@ from ..schemas.analytics import (
     DashboardStats,
     AlertStats
 )
-from ..models.analytics import ReportType, ReportFormat, ReportStatus, AnalyticsMetricType, DashboardType, MetricType
+from ..models.analytics import ReportType, ReportFormat, ReportStatus, AnalyticsMetricType, MetricType
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -39,27 +37,23 @@ router = APIRouter(prefix="/analytics", tags=["analytics"])
 @router.post("/reports", response_model=ReportResponse)
 async def create_report(
     report: ReportCreate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new report."""
     try:
-        return await analytics_service.create_report(
-            db,
-            current_user.id,
-            report.dict()
-        )
+        return await analytics_service.create_report(report, current_user.id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/reports/{report_id}", response_model=ReportResponse)
 async def get_report(
     report_id: int,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get a report by ID."""
-    report = await analytics_service.get_report(db, report_id)
+    report = await analytics_service.get_report(report_id)
     if not report or report.created_by != current_user.id:
         raise HTTPException(status_code=404, detail="Report not found")
     return report
@@ -70,12 +64,11 @@ async def get_user_reports(
     status: Optional[ReportStatus] = Query(None, description="Filter by status"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user reports with optional filters."""
-    return await analytics_service.get_user_reports(
-        db,
+    return await analytics_service.get_reports(
         current_user.id,
         report_type=report_type,
         status=status,
@@ -87,15 +80,11 @@ async def get_user_reports(
 async def update_report(
     report_id: int,
     report_update: ReportUpdate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update a report."""
-    report = await analytics_service.update_report(
-        db,
-        report_id,
-        report_update.dict(exclude_unset=True)
-    )
+    report = await analytics_service.update_report(report_id, report_update)
     if not report or report.created_by != current_user.id:
         raise HTTPException(status_code=404, detail="Report not found")
     return report
@@ -104,30 +93,27 @@ async def update_report(
 async def generate_report(
     report_id: int,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Generate a report file."""
-    report = await analytics_service.get_report(db, report_id)
+    report = await analytics_service.get_report(report_id)
     if not report or report.created_by != current_user.id:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    background_tasks.add_task(analytics_service.generate_report, db, report_id)
+    background_tasks.add_task(analytics_service.generate_report, report_id)
     return {"message": "Report generation started"}
 
 # Metrics Endpoints
 @router.post("/metrics", response_model=MetricResponse)
 async def create_metric(
     metric: MetricCreate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new metric."""
     try:
-        return await analytics_service.create_metric(
-            db,
-            metric.dict()
-        )
+        return await analytics_service.create_metric(metric)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -135,16 +121,12 @@ async def create_metric(
 async def update_metric(
     metric_id: int,
     metric_data: MetricUpdate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update a metric."""
     try:
-        return await analytics_service.update_metric(
-            db,
-            metric_id,
-            metric_data
-        )
+        return await analytics_service.update_metric(metric_id, metric_data)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -152,12 +134,11 @@ async def update_metric(
 async def get_metrics(
     metric_type: Optional[MetricType] = Query(None, description="Filter by metric type"),
     time_period: Optional[str] = Query(None, description="Filter by time period"),
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get metrics with optional filters."""
     return await analytics_service.get_metrics(
-        db,
         metric_type=metric_type,
         time_period=time_period
     )
@@ -166,43 +147,36 @@ async def get_metrics(
 @router.post("/dashboards", response_model=DashboardResponse)
 async def create_dashboard(
     dashboard: DashboardCreate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new dashboard."""
     try:
-        return await analytics_service.create_dashboard(
-            db,
-            current_user.id,
-            dashboard.dict()
-        )
+        return await analytics_service.create_dashboard(dashboard, current_user.id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/dashboards/{dashboard_id}", response_model=DashboardResponse)
 async def get_dashboard(
     dashboard_id: int,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get a dashboard by ID."""
-    dashboard = await analytics_service.get_dashboard(db, dashboard_id)
+    dashboard = await analytics_service.get_dashboard(dashboard_id)
     if not dashboard or (not dashboard.is_public and dashboard.created_by != current_user.id):
         raise HTTPException(status_code=404, detail="Dashboard not found")
     return dashboard
 
 @router.get("/dashboards", response_model=List[DashboardResponse])
 async def get_user_dashboards(
-    dashboard_type: Optional[DashboardType] = None,
     is_public: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user dashboards."""
-    return await analytics_service.get_user_dashboards(
-        db,
+    return await analytics_service.get_dashboards(
         current_user.id,
-        dashboard_type=dashboard_type,
         is_public=is_public
     )
 
@@ -210,16 +184,11 @@ async def get_user_dashboards(
 async def update_dashboard(
     dashboard_id: int,
     dashboard_update: DashboardUpdate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update a dashboard."""
-    dashboard = await analytics_service.update_dashboard(
-        db,
-        dashboard_id,
-        current_user.id,
-        dashboard_update.dict(exclude_unset=True)
-    )
+    dashboard = await analytics_service.update_dashboard(dashboard_id, dashboard_update)
     if not dashboard:
         raise HTTPException(status_code=404, detail="Dashboard not found")
     return dashboard
@@ -228,26 +197,23 @@ async def update_dashboard(
 @router.post("/widgets", response_model=WidgetResponse)
 async def create_widget(
     widget: WidgetCreate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new widget."""
     try:
-        return await analytics_service.create_widget(
-            db,
-            widget.dict()
-        )
+        return await analytics_service.create_widget(widget)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/widgets/{widget_id}", response_model=WidgetResponse)
 async def get_widget(
     widget_id: int,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get a widget by ID."""
-    widget = await analytics_service.get_widget(db, widget_id)
+    widget = await analytics_service.get_widget(widget_id)
     if not widget:
         raise HTTPException(status_code=404, detail="Widget not found")
     return widget
@@ -255,25 +221,21 @@ async def get_widget(
 @router.get("/dashboards/{dashboard_id}/widgets", response_model=List[WidgetResponse])
 async def get_dashboard_widgets(
     dashboard_id: int,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all widgets for a dashboard."""
-    return await analytics_service.get_dashboard_widgets(db, dashboard_id)
+    return await analytics_service.get_dashboard_widgets(dashboard_id)
 
 @router.put("/widgets/{widget_id}", response_model=WidgetResponse)
 async def update_widget(
     widget_id: int,
     widget_update: WidgetUpdate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update a widget."""
-    widget = await analytics_service.update_widget(
-        db,
-        widget_id,
-        widget_update.dict(exclude_unset=True)
-    )
+    widget = await analytics_service.update_widget(widget_id, widget_update)
     if not widget:
         raise HTTPException(status_code=404, detail="Widget not found")
     return widget
@@ -282,13 +244,12 @@ async def update_widget(
 @router.post("/exports", response_model=AnalyticsExportResponse)
 async def create_export(
     export: AnalyticsExportCreate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new data export."""
     try:
         return await analytics_service.create_export(
-            db,
             current_user.id,
             export.dict()
         )
@@ -298,11 +259,11 @@ async def create_export(
 @router.get("/exports/{export_id}", response_model=AnalyticsExportResponse)
 async def get_export(
     export_id: int,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get an export by ID."""
-    export = await analytics_service.get_export(db, export_id)
+    export = await analytics_service.get_export(export_id)
     if not export or export.created_by != current_user.id:
         raise HTTPException(status_code=404, detail="Export not found")
     return export
@@ -313,12 +274,11 @@ async def get_user_exports(
     status: Optional[ReportStatus] = Query(None, description="Filter by status"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user exports with optional filters."""
     return await analytics_service.get_user_exports(
-        db,
         current_user.id,
         format=format,
         status=status,
@@ -330,12 +290,11 @@ async def get_user_exports(
 async def update_export(
     export_id: int,
     export_update: AnalyticsExportUpdate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update an export."""
     export = await analytics_service.update_export(
-        db,
         export_id,
         current_user.id,
         export_update.dict(exclude_unset=True)
@@ -347,18 +306,18 @@ async def update_export(
 # Statistics Endpoint
 @router.get("/stats", response_model=AnalyticsStats)
 async def get_analytics_stats(
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get comprehensive analytics statistics."""
     try:
-        return await analytics_service.get_analytics_stats(db)
+        return await analytics_service.get_analytics_stats()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/stats/reports", response_model=ReportStats)
 async def get_report_stats(
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get report statistics."""
@@ -369,7 +328,7 @@ async def get_report_stats(
 
 @router.get("/stats/metrics", response_model=MetricStats)
 async def get_metric_stats(
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get metric statistics."""
@@ -380,7 +339,7 @@ async def get_metric_stats(
 
 @router.get("/stats/dashboards", response_model=DashboardStats)
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get dashboard statistics."""
@@ -391,7 +350,7 @@ async def get_dashboard_stats(
 
 @router.get("/stats/alerts", response_model=AlertStats)
 async def get_alert_stats(
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get alert statistics."""
@@ -404,15 +363,12 @@ async def get_alert_stats(
 @router.post("/alerts", response_model=AlertResponse)
 async def create_alert(
     alert: AlertCreate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new alert."""
     try:
-        return await analytics_service.create_alert(
-            db,
-            alert.dict()
-        )
+        return await analytics_service.create_alert(alert)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -420,15 +376,11 @@ async def create_alert(
 async def update_alert(
     alert_id: int,
     alert_update: AlertUpdate,
-    db: Session = Depends(get_db),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update an alert."""
-    alert = await analytics_service.update_alert(
-        db,
-        alert_id,
-        alert_update.dict(exclude_unset=True)
-    )
+    alert = await analytics_service.update_alert(alert_id, alert_update)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     return alert 
\ No newline at end of file
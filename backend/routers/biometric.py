@@ -91,7 +91,7 @@ async def link_nhif_biometric(
     """Link NHIF ID with biometric data."""
     try:
         biometric_data = await biometric_file.read()
-        biometric_record = biometric_service.link_nhif_biometric(
+        biometric_record = await biometric_service.link_nhif_biometric(
             patient_id=patient_id,
             nhif_id=nhif_id,
             biometric_type=biometric_type,
@@ -112,7 +112,7 @@ async def verify_nhif_id(
 ):
     """Verify NHIF ID with the NHIF API."""
     try:
-        nhif_data = biometric_service.verify_nhif_id(nhif_id)
+        nhif_data = await biometric_service.verify_nhif_id(nhif_id)
         return nhif_data
     except Exception as e:
         raise HTTPException(
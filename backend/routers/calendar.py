@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from ..database import get_db
+from ..database import get_async_db
 from ..models.calendar import EventType
 from ..services.calendar import calendar_service
 from ..schemas.calendar import CalendarEventCreate, CalendarEventUpdate, CalendarEventResponse
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/calendar", tags=["calendar"])
 @router.post("/events", response_model=CalendarEventResponse)
 async def create_event(
     event: CalendarEventCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(auth.get_current_active_user)
 ):
     """Create a new calendar event."""
@@ -26,7 +26,7 @@ async def create_event(
 @router.get("/events/{event_id}", response_model=CalendarEventResponse)
 async def get_event(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(auth.get_current_active_user)
 ):
     """Get a calendar event by ID."""
@@ -39,7 +39,7 @@ async def get_event(
 async def update_event(
     event_id: int,
     event_update: CalendarEventUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(auth.get_current_active_user)
 ):
     """Update a calendar event."""
@@ -55,7 +55,7 @@ async def update_event(
 @router.delete("/events/{event_id}")
 async def delete_event(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(auth.get_current_active_user)
 ):
     """Delete a calendar event."""
@@ -69,7 +69,11 @@ async def get_events(
     event_type: Optional[EventType] = Query(None, description="Filter by event type"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
-    db: Session = Depends(get_db),
+    after: Optional[datetime] = Query(None, description="Return events starting after this time"),
+    after_id: Optional[int] = Query(None, description="Id of the last event seen at `after`, for keyset paging"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of events"),
+    offset: int = Query(0, ge=0, description="Number of events to skip"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(auth.get_current_active_user)
 ):
     """Get calendar events with filters."""
@@ -77,6 +81,10 @@ async def get_events(
         db,
         event_type=event_type,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        after=after,
+        after_id=after_id,
+        limit=limit,
+        offset=offset
     )
     return events 
\ No newline at end of file
@@ -26,35 +26,35 @@ from ..schemas.chw import (
 router = APIRouter(prefix="/chws", tags=["chws"])
 
 @router.post("/", response_model=CHWResponse)
-async def create_chw(
+def create_chw(
     chw: CHWCreate,
     db: Session = Depends(get_db)
 ):
     """Create a new CHW."""
     try:
-        return await chw_service.create_chw(db, chw.dict())
+        return chw_service.create_chw(db, chw.dict())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{chw_id}", response_model=CHWResponse)
-async def get_chw(
+def get_chw(
     chw_id: int,
     db: Session = Depends(get_db)
 ):
     """Get a CHW by ID."""
-    chw = await chw_service.get_chw(db, chw_id)
+    chw = chw_service.get_chw(db, chw_id)
     if not chw:
         raise HTTPException(status_code=404, detail="CHW not found")
     return chw
 
 @router.put("/{chw_id}", response_model=CHWResponse)
-async def update_chw(
+def update_chw(
     chw_id: int,
     chw_update: CHWUpdate,
     db: Session = Depends(get_db)
 ):
     """Update a CHW's information."""
-    chw = await chw_service.update_chw(
+    chw = chw_service.update_chw(
         db,
         chw_id,
         chw_update.dict(exclude_unset=True)
@@ -64,7 +64,7 @@ async def update_chw(
     return chw
 
 @router.post("/{chw_id}/visits", response_model=VisitResponse)
-async def create_visit(
+def create_visit(
     chw_id: int,
     visit: VisitCreate,
     db: Session = Depends(get_db)
@@ -73,18 +73,18 @@ async def create_visit(
     try:
         visit_data = visit.dict()
         visit_data["chw_id"] = chw_id
-        return await chw_service.create_visit(db, visit_data)
+        return chw_service.create_visit(db, visit_data)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/visits/{visit_id}", response_model=VisitResponse)
-async def update_visit(
+def update_visit(
     visit_id: int,
     visit_update: VisitUpdate,
     db: Session = Depends(get_db)
 ):
     """Update a visit."""
-    visit = await chw_service.update_visit(
+    visit = chw_service.update_visit(
         db,
         visit_id,
         visit_update.dict(exclude_unset=True)
@@ -94,7 +94,7 @@ async def update_visit(
     return visit
 
 @router.get("/{chw_id}/visits", response_model=List[VisitResponse])
-async def get_visits(
+def get_visits(
     chw_id: int,
     patient_id: Optional[int] = Query(None, description="Filter by patient ID"),
     status: Optional[VisitStatus] = Query(None, description="Filter by visit status"),
@@ -104,7 +104,7 @@ async def get_visits(
     db: Session = Depends(get_db)
 ):
     """Get visits for a CHW with filters."""
-    visits = await chw_service.get_visits(
+    visits = chw_service.get_visits(
         db,
         chw_id=chw_id,
         patient_id=patient_id,
@@ -116,7 +116,7 @@ async def get_visits(
     return visits
 
 @router.post("/{chw_id}/assignments", response_model=AssignmentResponse)
-async def create_assignment(
+def create_assignment(
     chw_id: int,
     assignment: AssignmentCreate,
     db: Session = Depends(get_db)
@@ -125,18 +125,18 @@ async def create_assignment(
     try:
         assignment_data = assignment.dict()
         assignment_data["chw_id"] = chw_id
-        return await chw_service.create_assignment(db, assignment_data)
+        return chw_service.create_assignment(db, assignment_data)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/assignments/{assignment_id}", response_model=AssignmentResponse)
-async def update_assignment(
+def update_assignment(
     assignment_id: int,
     assignment_update: AssignmentUpdate,
     db: Session = Depends(get_db)
 ):
     """Update an assignment."""
-    assignment = await chw_service.update_assignment(
+    assignment = chw_service.update_assignment(
         db,
         assignment_id,
         assignment_update.dict(exclude_unset=True)
@@ -146,7 +146,7 @@ async def update_assignment(
     return assignment
 
 @router.get("/{chw_id}/assignments", response_model=List[AssignmentResponse])
-async def get_assignments(
+def get_assignments(
     chw_id: int,
     patient_id: Optional[int] = Query(None, description="Filter by patient ID"),
     status: Optional[str] = Query(None, description="Filter by assignment status"),
@@ -154,7 +154,7 @@ async def get_assignments(
     db: Session = Depends(get_db)
 ):
     """Get assignments for a CHW with filters."""
-    assignments = await chw_service.get_assignments(
+    assignments = chw_service.get_assignments(
         db,
         chw_id=chw_id,
         patient_id=patient_id,
@@ -164,7 +164,7 @@ async def get_assignments(
     return assignments
 
 @router.post("/{chw_id}/performance", response_model=PerformanceResponse)
-async def create_performance(
+def create_performance(
     chw_id: int,
     performance: PerformanceCreate,
     db: Session = Depends(get_db)
@@ -173,19 +173,19 @@ async def create_performance(
     try:
         performance_data = performance.dict()
         performance_data["chw_id"] = chw_id
-        return await chw_service.create_performance(db, performance_data)
+        return chw_service.create_performance(db, performance_data)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{chw_id}/performance", response_model=List[PerformanceResponse])
-async def get_performance(
+def get_performance(
     chw_id: int,
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
     db: Session = Depends(get_db)
 ):
     """Get performance metrics for a CHW."""
-    performance = await chw_service.get_performance(
+    performance = chw_service.get_performance(
         db,
         chw_id,
         start_date=start_date,
@@ -194,7 +194,7 @@ async def get_performance(
     return performance
 
 @router.post("/{chw_id}/training", response_model=TrainingResponse)
-async def create_training(
+def create_training(
     chw_id: int,
     training: TrainingCreate,
     db: Session = Depends(get_db)
@@ -203,19 +203,19 @@ async def create_training(
     try:
         training_data = training.dict()
         training_data["chw_id"] = chw_id
-        return await chw_service.create_training(db, training_data)
+        return chw_service.create_training(db, training_data)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{chw_id}/training", response_model=List[TrainingResponse])
-async def get_training(
+def get_training(
     chw_id: int,
     status: Optional[str] = Query(None, description="Filter by training status"),
     active_only: bool = Query(True, description="Show only active training records"),
     db: Session = Depends(get_db)
 ):
     """Get training records for a CHW."""
-    training = await chw_service.get_training(
+    training = chw_service.get_training(
         db,
         chw_id,
         status=status,
@@ -224,7 +224,7 @@ async def get_training(
     return training
 
 @router.get("/{chw_id}/stats", response_model=CHWStats)
-async def get_chw_stats(
+def get_chw_stats(
     chw_id: int,
     start_date: Optional[datetime] = Query(None, description="Start date for stats"),
     end_date: Optional[datetime] = Query(None, description="End date for stats"),
@@ -232,7 +232,7 @@ async def get_chw_stats(
 ):
     """Get comprehensive statistics for a CHW."""
     try:
-        return await chw_service.get_chw_stats(
+        return chw_service.get_chw_stats(
             db,
             chw_id,
             start_date=start_date,
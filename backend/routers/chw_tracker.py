@@ -120,6 +120,19 @@ async def track_location(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/location/batch")
+async def bulk_track_locations(
+    locations: List[CHWLocationTrackingCreate],
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Track a batch of CHW location points during visits."""
+    try:
+        service = CHWTrackerService(db)
+        return {"tracked": await service.bulk_track_locations(locations)}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/stats/visits", response_model=CHWVisitStats)
 async def get_visit_stats(
     start_date: Optional[datetime] = None,
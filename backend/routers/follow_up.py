@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -44,24 +44,32 @@ async def get_follow_up(
 @router.get("/patient/{patient_id}", response_model=List[FollowUpResponse])
 async def get_patient_follow_ups(
     patient_id: int,
-    skip: int = Query(0, ge=0),
+    response: Response,
+    after_id: Optional[int] = Query(None, ge=0),
     limit: int = Query(100, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all follow-ups for a patient."""
-    return follow_up_service.get_patient_follow_ups(db, patient_id, skip, limit)
+    """Get follow-ups for a patient, paged by id; pass X-Next-After-Id back as after_id."""
+    follow_ups, next_after_id = follow_up_service.get_patient_follow_ups(db, patient_id, after_id, limit)
+    if next_after_id is not None:
+        response.headers["X-Next-After-Id"] = str(next_after_id)
+    return follow_ups
 
 @router.get("/doctor/{doctor_id}", response_model=List[FollowUpResponse])
 async def get_doctor_follow_ups(
     doctor_id: int,
-    skip: int = Query(0, ge=0),
+    response: Response,
+    after_id: Optional[int] = Query(None, ge=0),
     limit: int = Query(100, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all follow-ups for a doctor."""
-    return follow_up_service.get_doctor_follow_ups(db, doctor_id, skip, limit)
+    """Get follow-ups for a doctor, paged by id; pass X-Next-After-Id back as after_id."""
+    follow_ups, next_after_id = follow_up_service.get_doctor_follow_ups(db, doctor_id, after_id, limit)
+    if next_after_id is not None:
+        response.headers["X-Next-After-Id"] = str(next_after_id)
+    return follow_ups
 
 @router.put("/{follow_up_id}", response_model=FollowUpResponse)
 async def update_follow_up(
@@ -1,6 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, BeforeValidator, Field
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Any, Dict, Optional
+
+# Free-form JSON payload where an empty dict means "nothing set". Nullable
+# JSON columns are coerced to {} so validation/serialization stays on the
+# dict-only path instead of branching on None for every row.
+JSONDict = Annotated[Dict[str, Any], BeforeValidator(lambda v: {} if v is None else v)]
 
 class BaseSchema(BaseModel):
     """Base schema with common fields and utilities"""
@@ -13,4 +18,4 @@ class BaseSchema(BaseModel):
         from_attributes = True
         json_encoders = {
             datetime: lambda v: v.isoformat()
-        } 
\ No newline at end of file
+        } 
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field, HttpUrl, EmailStr
+from pydantic import BaseModel, Field, HttpUrl, EmailStr, TypeAdapter
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 from enum import Enum
+from .base import JSONDict
 from ..models.security import (
     PermissionType, ResourceType
 )
@@ -12,7 +13,7 @@ class RoleBase(BaseModel):
     description: Optional[str] = None
     is_system: bool = False
     is_active: bool = True
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: JSONDict = Field(default_factory=dict)
 
 class RoleCreate(RoleBase):
     pass
@@ -40,7 +41,7 @@ class PermissionBase(BaseModel):
     resource_id: Optional[int] = None
     is_system: bool = False
     is_active: bool = True
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: JSONDict = Field(default_factory=dict)
 
 class PermissionCreate(PermissionBase):
     pass
@@ -69,7 +70,7 @@ class APIKeyBase(BaseModel):
     expires_at: Optional[datetime] = None
     ip_whitelist: Optional[List[str]] = None
     rate_limit: Optional[int] = None
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: JSONDict = Field(default_factory=dict)
 
 class APIKeyCreate(APIKeyBase):
     pass
@@ -101,7 +102,7 @@ class AuditLogBase(BaseModel):
     action: str = Field(..., min_length=1, max_length=100)
     resource_type: ResourceType
     resource_id: Optional[int] = None
-    details: Optional[Dict[str, Any]] = None
+    details: JSONDict = Field(default_factory=dict)
     ip_address: Optional[str] = None
     user_agent: Optional[str] = None
     status: str = Field(..., min_length=1, max_length=50)
@@ -127,7 +128,7 @@ class SecurityPolicyBase(BaseModel):
     policy_type: str = Field(..., min_length=1, max_length=50)
     rules: Dict[str, Any]
     is_active: bool = True
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: JSONDict = Field(default_factory=dict)
 
 class SecurityPolicyCreate(SecurityPolicyBase):
     pass
@@ -160,4 +161,7 @@ class SecurityStats(BaseModel):
     recent_audit_logs: List[AuditLogResponse]
     security_policies: List[SecurityPolicyResponse]
     role_distribution: Dict[str, int]  # Number of users per role
-    permission_distribution: Dict[str, int]  # Number of roles per permission 
\ No newline at end of file
+    permission_distribution: Dict[str, int]  # Number of roles per permission
+
+# Validates a whole page of audit rows in one pydantic-core call
+audit_log_list_adapter = TypeAdapter(List[AuditLogResponse])
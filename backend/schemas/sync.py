@@ -1,8 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from enum import Enum
 
+from .base import JSONDict
 from ..models.sync import SyncType, SyncOperation, SyncStatus
 
 class SyncAction(str, Enum):
@@ -59,7 +60,7 @@ class SyncStatusResponse(SyncStatusBase):
     id: int
     status: SyncStatusEnum
     last_synced_at: Optional[datetime]
-    conflict_data: Optional[Dict[str, Any]]
+    conflict_data: JSONDict = Field(default_factory=dict)
     created_at: datetime
     updated_at: datetime
     user_id: int
@@ -100,7 +101,7 @@ class SyncLogBase(BaseModel):
     operation: SyncAction
     record_id: int
     status: SyncStatusEnum
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: JSONDict = Field(default_factory=dict)
 
 class SyncLogCreate(SyncLogBase):
     pass
@@ -121,7 +122,7 @@ class OfflineCacheBase(BaseModel):
     data: Dict[str, Any]
     version: int = 1
     is_deleted: bool = False
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: JSONDict = Field(default_factory=dict)
 
 class OfflineCacheCreate(OfflineCacheBase):
     pass
@@ -164,6 +165,9 @@ class SyncConflictResponse(SyncConflictBase):
     class Config:
         orm_mode = True
 
+# Validates a whole list of conflict rows in one pydantic-core call
+sync_conflict_list_adapter = TypeAdapter(List[SyncConflictResponse])
+
 class SyncRequest(BaseModel):
     device_id: str
     last_sync_time: Optional[datetime] = None
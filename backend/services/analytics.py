@@ -1,11 +1,19 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, desc, case, select, lambda_stmt, text, update, insert
+from sqlalchemy import Integer, Float, String, DateTime
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
+import asyncio
 import logging
 import json
 import os
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from fastapi import Depends
+from ..config import settings
+from ..database import get_async_db
+from ..cache import cached, invalidate_key
 from ..models.analytics import (
     Report, Metric, Dashboard, DashboardWidget, Export,
     ReportType, ReportFormat, ReportStatus,
@@ -24,46 +32,128 @@ from ..schemas.analytics import (
 
 logger = logging.getLogger(__name__)
 
+# Redis namespaces for the memoized statistics
+REPORT_STATS_CACHE = "analytics:report_stats"
+METRIC_STATS_CACHE = "analytics:metric_stats"
+DASHBOARD_STATS_CACHE = "analytics:dashboard_stats"
+ALERT_STATS_CACHE = "analytics:alert_stats"
+
+# Rows fetched from the server-side cursor per Parquet record batch
+REPORT_BATCH_SIZE = 5000
+
+# One parameterized statement per built-in report type, built once at import
+# and bound with the reporting window (:start, :end) on each run
+_REPORT_SQL = {
+    ReportType.PATIENT_HEALTH: text(
+        "SELECT patient_id, chw_id, visit_type, status, scheduled_date "
+        "FROM chw_visits "
+        "WHERE scheduled_date BETWEEN :start AND :end "
+        "ORDER BY patient_id, scheduled_date"
+    ).columns(
+        patient_id=Integer, chw_id=Integer, visit_type=String, status=String,
+        scheduled_date=DateTime
+    ),
+    ReportType.CHW_PERFORMANCE: text(
+        "SELECT chw_id, metric_date, visits_completed, patients_served, "
+        "follow_ups_completed, emergency_visits, average_response_time, "
+        "patient_satisfaction, compliance_rate "
+        "FROM chw_performance "
+        "WHERE metric_date BETWEEN :start AND :end "
+        "ORDER BY chw_id, metric_date"
+    ).columns(
+        chw_id=Integer, metric_date=DateTime, visits_completed=Integer,
+        patients_served=Integer, follow_ups_completed=Integer, emergency_visits=Integer,
+        average_response_time=Float, patient_satisfaction=Float, compliance_rate=Float
+    ),
+    ReportType.ADHERENCE: text(
+        "SELECT patient_id, chw_id, status, adherence_rate, last_check_date "
+        "FROM adherence_tracking "
+        "WHERE last_check_date BETWEEN :start AND :end "
+        "ORDER BY patient_id"
+    ).columns(
+        patient_id=Integer, chw_id=Integer, status=String, adherence_rate=Float,
+        last_check_date=DateTime
+    ),
+    ReportType.RESOURCE_UTILIZATION: text(
+        "SELECT doctor_id, appointment_type, status, scheduled_at, duration_minutes "
+        "FROM appointment "
+        "WHERE scheduled_at BETWEEN :start AND :end "
+        "ORDER BY scheduled_at"
+    ).columns(
+        doctor_id=Integer, appointment_type=String, status=String, scheduled_at=DateTime,
+        duration_minutes=Integer
+    ),
+    ReportType.PROGRAM_EFFECTIVENESS: text(
+        "SELECT program_id, chw_id, status, progress, enrollment_date "
+        "FROM program_enrollments "
+        "WHERE enrollment_date BETWEEN :start AND :end "
+        "ORDER BY program_id"
+    ).columns(
+        program_id=Integer, chw_id=Integer, status=String, progress=Float,
+        enrollment_date=DateTime
+    ),
+}
+
+# Arrow type for each column type used in the report templates above
+_ARROW_TYPES = {
+    Integer: pa.int64(),
+    Float: pa.float64(),
+    String: pa.string(),
+    DateTime: pa.timestamp("us"),
+}
+
+def _arrow_schema(statement) -> pa.Schema:
+    """Parquet schema for a report template, fixed by its declared columns.
+
+    Inferring it from the first batch would lock in a null type for any
+    column that happens to be all-NULL there and reject every later batch.
+    """
+    return pa.schema([
+        pa.field(column.name, _ARROW_TYPES[type(column.type)])
+        for column in statement.selected_columns
+    ])
+
 class AnalyticsService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
+        self._report_generators = {
+            report_type: self._generate_templated_report
+            for report_type in _REPORT_SQL
+        }
 
     # Report Management
     async def create_report(self, report_data: ReportCreate, user_id: int) -> Report:
         """Create a new report."""
         try:
-            report = Report(
-                **report_data.dict(),
-                generated_by=user_id,
-                status="pending"
+            report = await self._insert(
+                Report,
+                {**report_data.dict(), "generated_by": user_id, "status": "pending"}
             )
-            self.db.add(report)
-            self.db.commit()
-            self.db.refresh(report)
+            await self.db.commit()
             
             # Generate report data asynchronously
             await self._generate_report_data(report)
+            await invalidate_key(REPORT_STATS_CACHE, user_id)
             return report
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error creating report: {str(e)}")
             raise
 
     async def update_report(self, report_id: int, report_data: ReportUpdate) -> Report:
         """Update a report."""
         try:
-            report = self.db.query(Report).filter(Report.id == report_id).first()
+            report = await self._update_by_id(
+                Report, report_id, report_data.dict(exclude_unset=True)
+            )
             if not report:
                 raise ValueError("Report not found")
 
-            for key, value in report_data.dict(exclude_unset=True).items():
-                setattr(report, key, value)
-
-            self.db.commit()
-            self.db.refresh(report)
+            await self.db.commit()
+            await invalidate_key(REPORT_STATS_CACHE, report.generated_by)
             return report
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error updating report: {str(e)}")
             raise
 
@@ -71,18 +161,25 @@ class AnalyticsService:
         self,
         user_id: int,
         report_type: Optional[ReportType] = None,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
     ) -> List[Report]:
         """Get reports with optional filters."""
         try:
-            query = self.db.query(Report).filter(Report.generated_by == user_id)
+            stmt = lambda_stmt(lambda: select(Report).where(Report.generated_by == user_id))
 
             if report_type:
-                query = query.filter(Report.report_type == report_type)
+                stmt += lambda s: s.where(Report.report_type == report_type)
             if status:
-                query = query.filter(Report.status == status)
-
-            return query.order_by(desc(Report.created_at)).all()
+                stmt += lambda s: s.where(Report.status == status)
+            if start_date:
+                stmt += lambda s: s.where(Report.created_at >= start_date)
+            if end_date:
+                stmt += lambda s: s.where(Report.created_at <= end_date)
+
+            stmt += lambda s: s.order_by(desc(Report.created_at))
+            return (await self.db.execute(stmt)).scalars().all()
         except Exception as e:
             logger.error(f"Error getting reports: {str(e)}")
             raise
@@ -91,31 +188,29 @@ class AnalyticsService:
     async def create_metric(self, metric_data: MetricCreate) -> Metric:
         """Create a new metric."""
         try:
-            metric = Metric(**metric_data.dict())
-            self.db.add(metric)
-            self.db.commit()
-            self.db.refresh(metric)
+            metric = await self._insert(Metric, metric_data.dict())
+            await self.db.commit()
+            await invalidate_key(METRIC_STATS_CACHE)
             return metric
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error creating metric: {str(e)}")
             raise
 
     async def update_metric(self, metric_id: int, metric_data: MetricUpdate) -> Metric:
         """Update a metric."""
         try:
-            metric = self.db.query(Metric).filter(Metric.id == metric_id).first()
+            metric = await self._update_by_id(
+                Metric, metric_id, metric_data.dict(exclude_unset=True)
+            )
             if not metric:
                 raise ValueError("Metric not found")
 
-            for key, value in metric_data.dict(exclude_unset=True).items():
-                setattr(metric, key, value)
-
-            self.db.commit()
-            self.db.refresh(metric)
+            await self.db.commit()
+            await invalidate_key(METRIC_STATS_CACHE)
             return metric
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error updating metric: {str(e)}")
             raise
 
@@ -126,14 +221,15 @@ class AnalyticsService:
     ) -> List[Metric]:
         """Get metrics with optional filters."""
         try:
-            query = self.db.query(Metric)
+            stmt = lambda_stmt(lambda: select(Metric))
 
             if metric_type:
-                query = query.filter(Metric.metric_type == metric_type)
+                stmt += lambda s: s.where(Metric.metric_type == metric_type)
             if time_period:
-                query = query.filter(Metric.time_period == time_period)
+                stmt += lambda s: s.where(Metric.time_period == time_period)
 
-            return query.order_by(desc(Metric.created_at)).all()
+            stmt += lambda s: s.order_by(desc(Metric.created_at))
+            return (await self.db.execute(stmt)).scalars().all()
         except Exception as e:
             logger.error(f"Error getting metrics: {str(e)}")
             raise
@@ -142,13 +238,14 @@ class AnalyticsService:
     async def create_dashboard(self, dashboard_data: DashboardCreate, user_id: int) -> Dashboard:
         """Create a new dashboard."""
         try:
-            dashboard = Dashboard(**dashboard_data.dict(), user_id=user_id)
-            self.db.add(dashboard)
-            self.db.commit()
-            self.db.refresh(dashboard)
+            dashboard = await self._insert(
+                Dashboard, {**dashboard_data.dict(), "user_id": user_id}
+            )
+            await self.db.commit()
+            await invalidate_key(DASHBOARD_STATS_CACHE)
             return dashboard
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error creating dashboard: {str(e)}")
             raise
 
@@ -159,20 +256,17 @@ class AnalyticsService:
     ) -> Dashboard:
         """Update a dashboard."""
         try:
-            dashboard = self.db.query(Dashboard).filter(
-                Dashboard.id == dashboard_id
-            ).first()
+            dashboard = await self._update_by_id(
+                Dashboard, dashboard_id, dashboard_data.dict(exclude_unset=True)
+            )
             if not dashboard:
                 raise ValueError("Dashboard not found")
 
-            for key, value in dashboard_data.dict(exclude_unset=True).items():
-                setattr(dashboard, key, value)
-
-            self.db.commit()
-            self.db.refresh(dashboard)
+            await self.db.commit()
+            await invalidate_key(DASHBOARD_STATS_CACHE)
             return dashboard
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error updating dashboard: {str(e)}")
             raise
 
@@ -183,17 +277,18 @@ class AnalyticsService:
     ) -> List[Dashboard]:
         """Get dashboards with optional filters."""
         try:
-            query = self.db.query(Dashboard).filter(
+            stmt = lambda_stmt(lambda: select(Dashboard).where(
                 or_(
                     Dashboard.user_id == user_id,
                     Dashboard.is_public == True
                 )
-            )
+            ))
 
             if is_public is not None:
-                query = query.filter(Dashboard.is_public == is_public)
+                stmt += lambda s: s.where(Dashboard.is_public == is_public)
 
-            return query.order_by(desc(Dashboard.created_at)).all()
+            stmt += lambda s: s.order_by(desc(Dashboard.created_at))
+            return (await self.db.execute(stmt)).scalars().all()
         except Exception as e:
             logger.error(f"Error getting dashboards: {str(e)}")
             raise
@@ -202,31 +297,29 @@ class AnalyticsService:
     async def create_widget(self, widget_data: WidgetCreate) -> Widget:
         """Create a new widget."""
         try:
-            widget = Widget(**widget_data.dict())
-            self.db.add(widget)
-            self.db.commit()
-            self.db.refresh(widget)
+            widget = await self._insert(Widget, widget_data.dict())
+            await self.db.commit()
+            await invalidate_key(DASHBOARD_STATS_CACHE)
             return widget
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error creating widget: {str(e)}")
             raise
 
     async def update_widget(self, widget_id: int, widget_data: WidgetUpdate) -> Widget:
         """Update a widget."""
         try:
-            widget = self.db.query(Widget).filter(Widget.id == widget_id).first()
+            widget = await self._update_by_id(
+                Widget, widget_id, widget_data.dict(exclude_unset=True)
+            )
             if not widget:
                 raise ValueError("Widget not found")
 
-            for key, value in widget_data.dict(exclude_unset=True).items():
-                setattr(widget, key, value)
-
-            self.db.commit()
-            self.db.refresh(widget)
+            await self.db.commit()
+            await invalidate_key(DASHBOARD_STATS_CACHE)
             return widget
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error updating widget: {str(e)}")
             raise
 
@@ -234,59 +327,63 @@ class AnalyticsService:
     async def create_alert(self, alert_data: AlertCreate) -> Alert:
         """Create a new alert."""
         try:
-            alert = Alert(**alert_data.dict())
-            self.db.add(alert)
-            self.db.commit()
-            self.db.refresh(alert)
+            alert = await self._insert(Alert, alert_data.dict())
+            await self.db.commit()
+            await invalidate_key(ALERT_STATS_CACHE)
             return alert
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error creating alert: {str(e)}")
             raise
 
     async def update_alert(self, alert_id: int, alert_data: AlertUpdate) -> Alert:
         """Update an alert."""
         try:
-            alert = self.db.query(Alert).filter(Alert.id == alert_id).first()
+            alert = await self._update_by_id(
+                Alert, alert_id, alert_data.dict(exclude_unset=True)
+            )
             if not alert:
                 raise ValueError("Alert not found")
 
-            for key, value in alert_data.dict(exclude_unset=True).items():
-                setattr(alert, key, value)
-
-            self.db.commit()
-            self.db.refresh(alert)
+            await self.db.commit()
+            await invalidate_key(ALERT_STATS_CACHE)
             return alert
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error updating alert: {str(e)}")
             raise
 
     # Statistics
+    @cached(REPORT_STATS_CACHE)
     async def get_report_stats(self, user_id: int) -> ReportStats:
         """Get report statistics."""
         try:
-            reports = self.db.query(Report).filter(
-                Report.generated_by == user_id
-            ).all()
-            
-            total_reports = len(reports)
+            is_completed = Report.status == "completed"
+            generation_seconds = (
+                func.extract("epoch", Report.updated_at)
+                - func.extract("epoch", Report.created_at)
+            )
+            rows = (await self.db.execute(
+                select(
+                    Report.report_type,
+                    func.count(Report.id),
+                    func.count(Report.id).filter(is_completed),
+                    func.sum(case((is_completed, generation_seconds), else_=0))
+                ).where(
+                    Report.generated_by == user_id
+                ).group_by(Report.report_type)
+            )).all()
+
             reports_by_type = {}
-            total_generation_time = 0
+            total_reports = 0
             successful_reports = 0
+            total_generation_time = 0
 
-            for report in reports:
-                # Count by type
-                report_type = report.report_type.value
-                reports_by_type[report_type] = reports_by_type.get(report_type, 0) + 1
-
-                # Calculate generation time
-                if report.status == "completed":
-                    generation_time = (
-                        report.updated_at - report.created_at
-                    ).total_seconds()
-                    total_generation_time += generation_time
-                    successful_reports += 1
+            for report_type, count, completed, generation_time in rows:
+                reports_by_type[report_type.value] = count
+                total_reports += count
+                successful_reports += completed
+                total_generation_time += generation_time or 0
 
             return ReportStats(
                 total_reports=total_reports,
@@ -299,31 +396,33 @@ class AnalyticsService:
             logger.error(f"Error getting report stats: {str(e)}")
             raise
 
+    @cached(METRIC_STATS_CACHE)
     async def get_metric_stats(self) -> MetricStats:
         """Get metric statistics."""
         try:
-            metrics = self.db.query(Metric).all()
-            
-            total_metrics = len(metrics)
+            update_hours = (
+                func.extract("epoch", Metric.updated_at)
+                - func.extract("epoch", Metric.created_at)
+            ) / 3600.0
+            rows = (await self.db.execute(
+                select(
+                    Metric.metric_type,
+                    func.count(Metric.id),
+                    func.sum(Metric.value),
+                    func.sum(update_hours)
+                ).group_by(Metric.metric_type)
+            )).all()
+
             metrics_by_type = {}
+            total_metrics = 0
             total_value = 0
             total_updates = 0
 
-            for metric in metrics:
-                # Count by type
-                metric_type = metric.metric_type.value
-                metrics_by_type[metric_type] = metrics_by_type.get(metric_type, 0) + 1
-
-                # Calculate average value
-                if metric.value is not None:
-                    total_value += metric.value
-
-                # Calculate update frequency
-                if metric.updated_at:
-                    update_time = (
-                        metric.updated_at - metric.created_at
-                    ).total_seconds() / 3600  # Convert to hours
-                    total_updates += update_time
+            for metric_type, count, value_sum, hours_sum in rows:
+                metrics_by_type[metric_type.value] = count
+                total_metrics += count
+                total_value += value_sum or 0
+                total_updates += hours_sum or 0
 
             return MetricStats(
                 total_metrics=total_metrics,
@@ -335,20 +434,24 @@ class AnalyticsService:
             logger.error(f"Error getting metric stats: {str(e)}")
             raise
 
+    @cached(DASHBOARD_STATS_CACHE)
     async def get_dashboard_stats(self) -> DashboardStats:
         """Get dashboard statistics."""
         try:
-            dashboards = self.db.query(Dashboard).all()
-            
-            total_dashboards = len(dashboards)
-            public_dashboards = len([d for d in dashboards if d.is_public])
-            total_widgets = sum(len(d.widgets) for d in dashboards)
-            widget_types = {}
+            total_dashboards, public_dashboards = (await self.db.execute(
+                select(
+                    func.count(Dashboard.id),
+                    func.count(Dashboard.id).filter(Dashboard.is_public == True)
+                )
+            )).one()
 
-            for dashboard in dashboards:
-                for widget in dashboard.widgets:
-                    widget_type = widget["widget_type"]
-                    widget_types[widget_type] = widget_types.get(widget_type, 0) + 1
+            # Served from the widget_type index; the per-type counts also
+            # give the widget total
+            widget_types = dict((await self.db.execute(
+                select(Widget.widget_type, func.count(Widget.id))
+                .group_by(Widget.widget_type)
+            )).all())
+            total_widgets = sum(widget_types.values())
 
             return DashboardStats(
                 total_dashboards=total_dashboards,
@@ -360,29 +463,37 @@ class AnalyticsService:
             logger.error(f"Error getting dashboard stats: {str(e)}")
             raise
 
+    @cached(ALERT_STATS_CACHE)
     async def get_alert_stats(self) -> AlertStats:
         """Get alert statistics."""
         try:
-            alerts = self.db.query(Alert).all()
-            
-            total_alerts = len(alerts)
-            active_alerts = len([a for a in alerts if a.is_active])
+            has_triggered = Alert.last_triggered.isnot(None)
+            response_hours = (
+                func.extract("epoch", Alert.last_triggered)
+                - func.extract("epoch", Alert.created_at)
+            ) / 3600.0
+            rows = (await self.db.execute(
+                select(
+                    Alert.severity,
+                    func.count(Alert.id),
+                    func.count(Alert.id).filter(Alert.is_active == True),
+                    func.count(Alert.id).filter(has_triggered),
+                    func.sum(response_hours).filter(has_triggered)
+                ).group_by(Alert.severity)
+            )).all()
+
             alerts_by_severity = {}
-            total_response_time = 0
+            total_alerts = 0
+            active_alerts = 0
             responded_alerts = 0
+            total_response_time = 0
 
-            for alert in alerts:
-                # Count by severity
-                severity = alert.severity
-                alerts_by_severity[severity] = alerts_by_severity.get(severity, 0) + 1
-
-                # Calculate response time
-                if alert.last_triggered:
-                    response_time = (
-                        alert.last_triggered - alert.created_at
-                    ).total_seconds() / 3600  # Convert to hours
-                    total_response_time += response_time
-                    responded_alerts += 1
+            for severity, count, active, responded, hours_sum in rows:
+                alerts_by_severity[severity] = count
+                total_alerts += count
+                active_alerts += active
+                responded_alerts += responded
+                total_response_time += hours_sum or 0
 
             return AlertStats(
                 total_alerts=total_alerts,
@@ -396,67 +507,138 @@ class AnalyticsService:
             raise
 
     # Helper Methods
+    async def _insert(self, model, values: Dict[str, Any]):
+        """INSERT one row and return it, defaults included, via RETURNING.
+
+        Replaces add/commit/refresh, which costs a second SELECT per insert.
+        """
+        result = await self.db.execute(insert(model).values(**values).returning(model))
+        return result.scalar_one()
+
+    async def _update_by_id(self, model, record_id: int, values: Dict[str, Any]):
+        """Apply a partial UPDATE to one row and return it via RETURNING.
+
+        Only the changed columns are sent and the row is not loaded first.
+        Returns None when no row matches.
+        """
+        if not values:
+            return await self.db.get(model, record_id)
+        result = await self.db.execute(
+            update(model)
+            .where(model.id == record_id)
+            .values(**values)
+            .returning(model)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
     async def _generate_report_data(self, report: Report) -> None:
         """Generate report data asynchronously."""
         try:
-            # Update report status
+            # Mark as processing within the same transaction; the status only
+            # becomes visible to other sessions with the final outcome, so a
+            # generation costs one commit instead of two.
             report.status = "processing"
-            self.db.commit()
+            await self.db.flush()
 
             # Generate report data based on type
-            if report.report_type == ReportType.PATIENT_HEALTH:
-                data = await self._generate_patient_health_report(report)
-            elif report.report_type == ReportType.CHW_PERFORMANCE:
-                data = await self._generate_chw_performance_report(report)
-            elif report.report_type == ReportType.ADHERENCE:
-                data = await self._generate_adherence_report(report)
-            elif report.report_type == ReportType.RESOURCE_UTILIZATION:
-                data = await self._generate_resource_utilization_report(report)
-            elif report.report_type == ReportType.PROGRAM_EFFECTIVENESS:
-                data = await self._generate_program_effectiveness_report(report)
-            else:
-                data = await self._generate_custom_report(report)
+            generator = self._report_generators.get(
+                report.report_type, self._generate_custom_report
+            )
+            data = await generator(report)
 
             # Update report with generated data
             report.data = data
             report.status = "completed"
-            self.db.commit()
+            await self.db.commit()
         except Exception as e:
+            await self.db.rollback()
             report.status = "failed"
             report.error_message = str(e)
-            self.db.commit()
+            await self.db.commit()
             logger.error(f"Error generating report data: {str(e)}")
             raise
 
-    async def _generate_patient_health_report(self, report: Report) -> Dict[str, Any]:
-        """Generate patient health report data."""
-        # Implementation depends on specific requirements
-        return {}
-
-    async def _generate_chw_performance_report(self, report: Report) -> Dict[str, Any]:
-        """Generate CHW performance report data."""
-        # Implementation depends on specific requirements
-        return {}
-
-    async def _generate_adherence_report(self, report: Report) -> Dict[str, Any]:
-        """Generate adherence report data."""
-        # Implementation depends on specific requirements
-        return {}
-
-    async def _generate_resource_utilization_report(self, report: Report) -> Dict[str, Any]:
-        """Generate resource utilization report data."""
-        # Implementation depends on specific requirements
-        return {}
-
-    async def _generate_program_effectiveness_report(self, report: Report) -> Dict[str, Any]:
-        """Generate program effectiveness report data."""
-        # Implementation depends on specific requirements
-        return {}
+    def _report_window(self, report: Report) -> Dict[str, Any]:
+        """Resolve the reporting period from the report parameters.
+
+        Parameters are stored as JSON, so dates arrive as ISO strings; they
+        are parsed here because the driver will not bind a string as a
+        timestamp. The start defaults to 30 days before the end.
+        """
+        parameters = report.parameters or {}
+        end = self._parse_report_date(parameters.get("end_date")) or datetime.utcnow()
+        start = self._parse_report_date(parameters.get("start_date")) or end - timedelta(days=30)
+        return {"start": start, "end": end}
+
+    @staticmethod
+    def _parse_report_date(value: Any) -> Optional[datetime]:
+        """Parse an ISO date/datetime report parameter into a datetime."""
+        if not value or isinstance(value, datetime):
+            return value or None
+        return datetime.fromisoformat(value)
+
+    async def _stream_report(self, report: Report, statement, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Stream query results into a Parquet file in fixed-size batches.
+
+        Rows are read through a server-side cursor so only one batch is held
+        in memory at a time; report.data stores the file location and the
+        per-column means of numeric columns, computed batch-wise with Arrow
+        kernels rather than row by row. File I/O runs in the default executor
+        so the event loop is not blocked while batches are written.
+        """
+        report_dir = os.path.join(settings.UPLOAD_DIR, "reports")
+        os.makedirs(report_dir, exist_ok=True)
+        path = os.path.join(report_dir, f"report_{report.id}.parquet")
+        schema = _arrow_schema(statement)
+        loop = asyncio.get_running_loop()
+
+        result = await self.db.stream(statement, params)
+
+        writer = None
+        row_count = 0
+        sums: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        try:
+            writer = await loop.run_in_executor(None, pq.ParquetWriter, path, schema)
+            async for rows in result.mappings().partitions(REPORT_BATCH_SIZE):
+                batch = pa.RecordBatch.from_pylist([dict(row) for row in rows], schema=schema)
+                await loop.run_in_executor(None, writer.write_batch, batch)
+                row_count += batch.num_rows
+
+                for name, column in zip(batch.schema.names, batch.columns):
+                    if name.endswith("_id"):
+                        continue
+                    if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+                        sums[name] = sums.get(name, 0) + (pc.sum(column).as_py() or 0)
+                        counts[name] = counts.get(name, 0) + pc.count(column).as_py()
+        finally:
+            await result.close()
+            if writer is not None:
+                await loop.run_in_executor(None, writer.close)
+
+        summary = {
+            name: {"mean": sums[name] / counts[name]}
+            for name in sums if counts[name] > 0
+        }
+        return {
+            "format": "parquet",
+            "path": path,
+            "row_count": row_count,
+            "summary": summary
+        }
+
+    async def _generate_templated_report(self, report: Report) -> Dict[str, Any]:
+        """Generate a built-in report from its precompiled SQL template."""
+        return await self._stream_report(
+            report, _REPORT_SQL[report.report_type], self._report_window(report)
+        )
 
     async def _generate_custom_report(self, report: Report) -> Dict[str, Any]:
         """Generate custom report data."""
         # Implementation depends on specific requirements
         return {}
 
-# Create singleton instance
-analytics_service = AnalyticsService() 
\ No newline at end of file
+def get_analytics_service(db: AsyncSession = Depends(get_async_db)) -> AnalyticsService:
+    """Provide an AnalyticsService bound to the request's session."""
+    return AnalyticsService(db) 
\ No newline at end of file
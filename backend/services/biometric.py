@@ -1,27 +1,61 @@
-from typing import Optional, Dict, Any
-import requests
+from typing import Optional, Dict, Any, List
+from collections import OrderedDict
+import hashlib
+import hmac
+import httpx
+import time
+import numpy as np
 from ..config import settings
+from ..database import commit_keep_loaded
 from ..models.patient import Patient
 from ..models.biometric import BiometricRecord
 from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, func
 
 class BiometricService:
     def __init__(self):
         self.nhif_api_key = settings.NHIF_API_KEY
         self.nhif_api_url = settings.NHIF_API_URL
         self.biometric_provider = settings.BIOMETRIC_PROVIDER
+        # Shared client so NHIF lookups reuse pooled connections
+        self._client = httpx.AsyncClient(
+            base_url=self.nhif_api_url,
+            headers={"Authorization": f"Bearer {self.nhif_api_key}"},
+            timeout=5.0
+        )
+        # LRU cache of NHIF verification responses: nhif_id -> (expires_at, data)
+        self._nhif_cache = OrderedDict()
+        self.nhif_cache_ttl = 300  # seconds
+        self.nhif_cache_size = 10000
     
-    def verify_nhif_id(self, nhif_id: str) -> Dict[str, Any]:
+    async def aclose(self) -> None:
+        """Close the pooled NHIF HTTP client."""
+        await self._client.aclose()
+    
+    @staticmethod
+    def _digest(biometric_data: bytes) -> bytes:
+        """Return the SHA-256 digest stored alongside a biometric template."""
+        return hashlib.sha256(biometric_data).digest()
+    
+    async def verify_nhif_id(self, nhif_id: str) -> Dict[str, Any]:
         """Verify NHIF ID with the NHIF API."""
+        cached = self._nhif_cache.get(nhif_id)
+        if cached and cached[0] > time.monotonic():
+            self._nhif_cache.move_to_end(nhif_id)
+            return cached[1]
+
         try:
-            response = requests.get(
-                f"{self.nhif_api_url}/verify/{nhif_id}",
-                headers={"Authorization": f"Bearer {self.nhif_api_key}"}
-            )
+            response = await self._client.get(f"/verify/{nhif_id}")
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            data = response.json()
+        except httpx.HTTPError as e:
             raise Exception(f"Error verifying NHIF ID: {str(e)}")
+
+        self._nhif_cache[nhif_id] = (time.monotonic() + self.nhif_cache_ttl, data)
+        self._nhif_cache.move_to_end(nhif_id)
+        if len(self._nhif_cache) > self.nhif_cache_size:
+            self._nhif_cache.popitem(last=False)
+        return data
     
     def capture_fingerprint(
         self,
@@ -32,15 +66,16 @@ class BiometricService:
         """Capture and store fingerprint data."""
         try:
             # Store fingerprint data
-            biometric_record = BiometricRecord(
-                patient_id=patient_id,
-                biometric_type="fingerprint",
-                biometric_data=fingerprint_data,
-                provider=self.biometric_provider
-            )
-            db.add(biometric_record)
-            db.commit()
-            db.refresh(biometric_record)
+            biometric_record = db.scalars(
+                insert(BiometricRecord).values(
+                    patient_id=patient_id,
+                    biometric_type="fingerprint",
+                    biometric_data=fingerprint_data,
+                    biometric_hash=self._digest(fingerprint_data),
+                    provider=self.biometric_provider
+                ).returning(BiometricRecord)
+            ).one()
+            commit_keep_loaded(db)
             return biometric_record
         except Exception as e:
             db.rollback()
@@ -55,20 +90,50 @@ class BiometricService:
         """Capture and store facial recognition data."""
         try:
             # Store facial recognition data
-            biometric_record = BiometricRecord(
-                patient_id=patient_id,
-                biometric_type="facial",
-                biometric_data=facial_data,
-                provider=self.biometric_provider
-            )
-            db.add(biometric_record)
-            db.commit()
-            db.refresh(biometric_record)
+            biometric_record = db.scalars(
+                insert(BiometricRecord).values(
+                    patient_id=patient_id,
+                    biometric_type="facial",
+                    biometric_data=facial_data,
+                    biometric_hash=self._digest(facial_data),
+                    provider=self.biometric_provider
+                ).returning(BiometricRecord)
+            ).one()
+            commit_keep_loaded(db)
             return biometric_record
         except Exception as e:
             db.rollback()
             raise Exception(f"Error capturing facial ID: {str(e)}")
     
+    def capture_many(
+        self,
+        rows: List[Dict[str, Any]],
+        db: Session
+    ) -> List[int]:
+        """Store a batch of biometric captures in one round trip.
+
+        Each row needs patient_id, biometric_type and biometric_data, and may
+        carry nhif_id. Returns the new record IDs in input order.
+        """
+        try:
+            values = [
+                {
+                    **row,
+                    "biometric_hash": self._digest(row["biometric_data"]),
+                    "provider": row.get("provider", self.biometric_provider)
+                }
+                for row in rows
+            ]
+            ids = db.scalars(
+                insert(BiometricRecord).returning(BiometricRecord.id, sort_by_parameter_order=True),
+                values
+            ).all()
+            db.commit()
+            return ids
+        except Exception as e:
+            db.rollback()
+            raise Exception(f"Error capturing biometrics: {str(e)}")
+    
     def verify_biometric(
         self,
         patient_id: int,
@@ -78,22 +143,81 @@ class BiometricService:
     ) -> bool:
         """Verify biometric data against stored records."""
         try:
-            # Get stored biometric record
-            stored_record = db.query(BiometricRecord).filter(
+            # Get stored biometric digest; the raw blob is only fetched for
+            # records enrolled before digests were stored
+            stored = db.query(BiometricRecord.id, BiometricRecord.biometric_hash).filter(
                 BiometricRecord.patient_id == patient_id,
                 BiometricRecord.biometric_type == biometric_type
-            ).first()
+            ).limit(1).first()
             
-            if not stored_record:
+            if not stored:
                 return False
+
+            stored_hash = stored.biometric_hash
+            if stored_hash is None:
+                stored_data = db.query(BiometricRecord.biometric_data).filter(
+                    BiometricRecord.id == stored.id
+                ).scalar()
+                if not stored_data:
+                    return False
+                # Fill in the digest so later checks skip the blob
+                stored_hash = self._digest(stored_data)
+                db.query(BiometricRecord).filter(
+                    BiometricRecord.id == stored.id
+                ).update({BiometricRecord.biometric_hash: stored_hash}, synchronize_session=False)
+                db.commit()
             
-            # Compare biometric data
+            # Compare biometric digests
             # Note: In a real implementation, this would use proper biometric matching algorithms
-            return stored_record.biometric_data == biometric_data
+            return hmac.compare_digest(stored_hash, self._digest(biometric_data))
         except Exception as e:
             raise Exception(f"Error verifying biometric: {str(e)}")
     
-    def link_nhif_biometric(
+    def identify(
+        self,
+        biometric_type: str,
+        biometric_data: bytes,
+        db: Session,
+        max_distance: float = 0.25,
+        batch_size: int = 10000
+    ) -> Optional[int]:
+        """Identify the patient whose stored template is closest to a probe.
+
+        Templates of the same type and length are streamed in batches into a
+        uint8 matrix and compared with the probe by Hamming distance
+        (XOR + bit count) in NumPy. Returns the best patient_id when its
+        distance is within ``max_distance`` of the template bits, else None.
+        """
+        try:
+            probe = np.frombuffer(biometric_data, dtype=np.uint8)
+            stmt = select(
+                BiometricRecord.patient_id,
+                BiometricRecord.biometric_data
+            ).where(
+                BiometricRecord.biometric_type == biometric_type,
+                func.length(BiometricRecord.biometric_data) == probe.size
+            ).execution_options(yield_per=batch_size)
+
+            best_patient_id = None
+            best_distance = None
+            for rows in db.execute(stmt).partitions():
+                patient_ids = [row[0] for row in rows]
+                templates = np.frombuffer(
+                    b"".join(row[1] for row in rows), dtype=np.uint8
+                ).reshape(len(rows), probe.size)
+                distances = np.unpackbits(templates ^ probe, axis=1).sum(axis=1)
+                index = int(distances.argmin())
+                if best_distance is None or distances[index] < best_distance:
+                    best_distance = int(distances[index])
+                    best_patient_id = patient_ids[index]
+
+            if best_distance is None or best_distance > max_distance * probe.size * 8:
+                return None
+            return best_patient_id
+        except Exception as e:
+            raise Exception(f"Error identifying biometric: {str(e)}")
+    
+    async def link_nhif_biometric(
         self,
         patient_id: int,
         nhif_id: str,
@@ -104,19 +228,20 @@ class BiometricService:
         """Link NHIF ID with biometric data."""
         try:
             # Verify NHIF ID
-            nhif_data = self.verify_nhif_id(nhif_id)
+            nhif_data = await self.verify_nhif_id(nhif_id)
             
             # Store biometric record with NHIF ID
-            biometric_record = BiometricRecord(
-                patient_id=patient_id,
-                nhif_id=nhif_id,
-                biometric_type=biometric_type,
-                biometric_data=biometric_data,
-                provider=self.biometric_provider
-            )
-            db.add(biometric_record)
-            db.commit()
-            db.refresh(biometric_record)
+            biometric_record = db.scalars(
+                insert(BiometricRecord).values(
+                    patient_id=patient_id,
+                    nhif_id=nhif_id,
+                    biometric_type=biometric_type,
+                    biometric_data=biometric_data,
+                    biometric_hash=self._digest(biometric_data),
+                    provider=self.biometric_provider
+                ).returning(BiometricRecord)
+            ).one()
+            commit_keep_loaded(db)
             return biometric_record
         except Exception as e:
             db.rollback()
@@ -1,4 +1,5 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, lambda_stmt, update, insert, and_, or_
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
@@ -9,59 +10,84 @@ class CalendarService:
     def __init__(self):
         pass
 
-    async def create_event(self, db: Session, event_data: Dict[str, Any]) -> CalendarEvent:
+    async def create_event(self, db: AsyncSession, event_data: Dict[str, Any]) -> CalendarEvent:
         """Create a new calendar event."""
-        event = CalendarEvent(**event_data)
-        db.add(event)
-        db.commit()
-        db.refresh(event)
+        result = await db.execute(
+            insert(CalendarEvent).values(**event_data).returning(CalendarEvent)
+        )
+        event = result.scalar_one()
+        await db.commit()
         return event
 
-    async def get_event(self, db: Session, event_id: int) -> Optional[CalendarEvent]:
+    async def get_event(self, db: AsyncSession, event_id: int) -> Optional[CalendarEvent]:
         """Get a calendar event by ID."""
-        return db.query(CalendarEvent).filter(CalendarEvent.id == event_id).first()
+        return await db.get(CalendarEvent, event_id)
 
-    async def update_event(self, db: Session, event_id: int, event_data: Dict[str, Any]) -> Optional[CalendarEvent]:
+    async def update_event(self, db: AsyncSession, event_id: int, event_data: Dict[str, Any]) -> Optional[CalendarEvent]:
         """Update a calendar event."""
-        event = await self.get_event(db, event_id)
+        if not event_data:
+            return await self.get_event(db, event_id)
+
+        result = await db.execute(
+            update(CalendarEvent)
+            .where(CalendarEvent.id == event_id)
+            .values(**event_data)
+            .returning(CalendarEvent)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        event = result.scalar_one_or_none()
         if not event:
             return None
 
-        for key, value in event_data.items():
-            setattr(event, key, value)
-
-        db.commit()
-        db.refresh(event)
+        await db.commit()
         return event
 
-    async def delete_event(self, db: Session, event_id: int) -> bool:
+    async def delete_event(self, db: AsyncSession, event_id: int) -> bool:
         """Delete a calendar event."""
         event = await self.get_event(db, event_id)
         if not event:
             return False
 
-        db.delete(event)
-        db.commit()
+        await db.delete(event)
+        await db.commit()
         return True
 
     async def get_events(
         self,
-        db: Session,
+        db: AsyncSession,
         event_type: Optional[str] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        offset: int = 0
     ) -> List[CalendarEvent]:
-        """Get calendar events with filters."""
-        query = db.query(CalendarEvent)
+        """Get calendar events with filters, ordered by start time and id.
+
+        Pass the start_time and id of the last event seen as ``after`` and
+        ``after_id`` to page by keyset instead of a deep ``offset``. Without
+        ``after_id``, ``after`` only keeps events starting strictly later.
+        """
+        stmt = lambda_stmt(lambda: select(CalendarEvent))
 
         if event_type:
-            query = query.filter(CalendarEvent.event_type == event_type)
+            stmt += lambda s: s.where(CalendarEvent.event_type == event_type)
         if start_date:
-            query = query.filter(CalendarEvent.start_time >= start_date)
+            stmt += lambda s: s.where(CalendarEvent.start_time >= start_date)
         if end_date:
-            query = query.filter(CalendarEvent.end_time <= end_date)
+            stmt += lambda s: s.where(CalendarEvent.end_time <= end_date)
+        if after and after_id is not None:
+            # Events sharing the last start_time are continued by id
+            stmt += lambda s: s.where(or_(
+                CalendarEvent.start_time > after,
+                and_(CalendarEvent.start_time == after, CalendarEvent.id > after_id)
+            ))
+        elif after:
+            stmt += lambda s: s.where(CalendarEvent.start_time > after)
 
-        return query.all()
+        stmt += lambda s: s.order_by(CalendarEvent.start_time, CalendarEvent.id).limit(limit).offset(offset)
+        return (await db.execute(stmt)).scalars().all()
 
 # Create a singleton instance
 calendar_service = CalendarService() 
\ No newline at end of file
@@ -1,104 +1,241 @@
 from typing import Dict, Any, Optional, List
 import logging
+import asyncio
+from functools import lru_cache
 from datetime import datetime
 from sqlalchemy.orm import Session
-from ..models.notification import Notification, NotificationTemplate
+from ..config import settings
+from ..models.notification import (
+    Notification,
+    NotificationTemplate,
+    NotificationType,
+    NotificationChannel,
+    NotificationStatus
+)
 from ..models.patient import Patient
 from ..models.scheduling import FollowUpSchedule
-from ..schemas.notification import NotificationCreate
 from ..schemas.scheduling import FollowUpScheduleCreate
 import re
-import json
+import random
+import ahocorasick
+
+try:
+    import hyperscan
+except ImportError:  # no wheel for this platform; the keyword automaton is used
+    hyperscan = None
 
 logger = logging.getLogger(__name__)
 
+_utcnow = datetime.utcnow
+
+# Notification rows are written in batches once either limit is reached
+NOTIFICATION_BATCH_SIZE = 50
+NOTIFICATION_FLUSH_INTERVAL = 2.0  # seconds
+# Oldest rows are dropped beyond this many unwritten rows per service
+NOTIFICATION_BUFFER_LIMIT = 500
+
+# Services holding unwritten notification rows, flushed on shutdown
+_services_with_pending: set = set()
+
+# Sub-intent keywords: one scan of the (lower-cased) message finds the first
+# keyword, and the dispatch table maps it to the response key and action
+_APPOINTMENT_KEYWORDS = re.compile(r"reschedule|schedule|book|when|next|change|cancel")
+_APPOINTMENT_DISPATCH = {
+    "schedule": ("schedule", "schedule_appointment"),
+    "book": ("schedule", "schedule_appointment"),
+    "when": ("check", None),
+    "next": ("check", None),
+    "reschedule": ("reschedule", "reschedule_appointment"),
+    "change": ("reschedule", "reschedule_appointment"),
+    "cancel": ("cancel", "cancel_appointment"),
+}
+
+_MEDICATION_KEYWORDS = re.compile(r"when|dosage|side|effect|refill|renew")
+_MEDICATION_DISPATCH = {
+    "when": ("dosage", "get_medication_schedule"),
+    "dosage": ("dosage", "get_medication_schedule"),
+    "side": ("side_effects", "get_medication_info"),
+    "effect": ("side_effects", "get_medication_info"),
+    "refill": ("refill", "request_refill"),
+    "renew": ("refill", "request_refill"),
+}
+
+_GENERAL_INFO_KEYWORDS = re.compile(r"hour|time|location|address|contact|phone|insurance|coverage")
+_GENERAL_INFO_DISPATCH = {
+    "hour": ("hours", None),
+    "time": ("hours", None),
+    "location": ("location", "send_location"),
+    "address": ("location", "send_location"),
+    "contact": ("contact", None),
+    "phone": ("contact", None),
+    "insurance": ("insurance", "check_insurance"),
+    "coverage": ("insurance", "check_insurance"),
+}
+
+def _load_intents() -> Dict[str, Any]:
+    """Load chatbot intents from configuration"""
+    intents = {
+        "greeting": {
+            "keywords": [
+                "hi", "hello", "hey", "greetings",
+                "good morning", "good afternoon", "good evening",
+                "how are you"
+            ],
+            "responses": [
+                "Hello! How can I help you today?",
+                "Hi there! What can I do for you?",
+                "Greetings! How may I assist you?"
+            ]
+        },
+        "appointment": {
+            "keywords": [
+                "schedule", "book", "make an appointment",
+                "when is my appointment", "when is my next appointment",
+                "reschedule", "change appointment",
+                "cancel appointment"
+            ],
+            "responses": {
+                "schedule": "I'll help you schedule an appointment. What type of appointment do you need?",
+                "check": "Let me check your upcoming appointments.",
+                "reschedule": "I'll help you reschedule your appointment. Which appointment would you like to change?",
+                "cancel": "I'll help you cancel your appointment. Which appointment would you like to cancel?"
+            }
+        },
+        "medication": {
+            "keywords": [
+                "medication", "medicine", "prescription",
+                "when to take", "dosage", "how many",
+                "side effects", "reactions",
+                "refill", "renew prescription"
+            ],
+            "responses": {
+                "info": "Let me check your medication information.",
+                "dosage": "Here's your medication schedule:",
+                "side_effects": "Here are the possible side effects:",
+                "refill": "I'll help you request a prescription refill."
+            }
+        },
+        "emergency": {
+            "keywords": [
+                "emergency", "urgent", "immediate",
+                "severe pain", "bleeding", "fever",
+                "can't breathe", "chest pain"
+            ],
+            "responses": [
+                "This seems urgent. Please call emergency services immediately.",
+                "For emergencies, please call 911 or go to the nearest emergency room.",
+                "This requires immediate medical attention. Please seek emergency care."
+            ]
+        },
+        "general_info": {
+            "keywords": [
+                "clinic hours", "opening times",
+                "location", "address", "directions",
+                "contact", "phone number", "email",
+                "insurance", "coverage", "payment"
+            ],
+            "responses": {
+                "hours": "Our clinic hours are Monday to Friday, 9 AM to 5 PM.",
+                "location": "We are located at 123 Medical Center Drive.",
+                "contact": "You can reach us at (555) 123-4567 or info@clinic.com",
+                "insurance": "We accept most major insurance providers. Would you like to check your coverage?"
+            }
+        },
+        "feedback": {
+            "keywords": [
+                "feedback", "review", "rating",
+                "complaint", "issue", "problem",
+                "suggestion", "improve", "better"
+            ],
+            "responses": [
+                "Thank you for your feedback. We'll use it to improve our services.",
+                "I'm sorry to hear about your experience. Let me help you with that.",
+                "Your feedback is valuable to us. Thank you for sharing."
+            ]
+        }
+    }
+    return intents
+
+def _build_intent_automaton(intents: Dict[str, Any]) -> "ahocorasick.Automaton":
+    """Build one Aho-Corasick automaton over every intent keyword"""
+    # Every trigger is a literal keyword, so a message is classified in a
+    # single pass over it
+    automaton = ahocorasick.Automaton()
+    for intent, data in intents.items():
+        for keyword in data["keywords"]:
+            automaton.add_word(keyword, intent)
+    automaton.make_automaton()
+    return automaton
+
+def _build_intent_database(intents: Dict[str, Any]):
+    """Compile every intent keyword into one Hyperscan multi-pattern database.
+
+    Returns the database and the intent for each pattern id.
+    """
+    keywords = [
+        (keyword, intent)
+        for intent, data in intents.items()
+        for keyword in data["keywords"]
+    ]
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[re.escape(keyword).encode() for keyword, _ in keywords],
+        ids=list(range(len(keywords))),
+        elements=len(keywords),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(keywords)
+    )
+    return database, [intent for _, intent in keywords]
+
+# Built once at import and shared by every ChatbotService instance
+_INTENTS = _load_intents()
+_INTENT_AUTOMATON = _build_intent_automaton(_INTENTS)
+_INTENT_DATABASE, _INTENT_IDS = (
+    _build_intent_database(_INTENTS) if hyperscan is not None else (None, None)
+)
+
+# Detection is a pure function of the message and repeat messages ("yes",
+# "hours", "1") are common, so results are memoized per normalized message
+@lru_cache(maxsize=4096)
+def _detect_intent_cached(message: str) -> Optional[str]:
+    """Detect intent from a lower-cased message"""
+    if _INTENT_DATABASE is not None:
+        # Hyperscan reports matches in order of end offset, so the first
+        # one is the earliest keyword in the message
+        matched = []
+        _INTENT_DATABASE.scan(
+            message.encode(),
+            match_event_handler=lambda id, start, end, flags, context: matched.append(id)
+        )
+        return _INTENT_IDS[matched[0]] if matched else None
+
+    for _, intent in _INTENT_AUTOMATON.iter(message):
+        return intent
+    return None
+
 class ChatbotService:
     def __init__(self, db: Session):
         self.db = db
-        self.intents = self._load_intents()
+        self.intents = _INTENTS
         self.context = {}
-
-    def _load_intents(self) -> Dict[str, Any]:
-        """Load chatbot intents from configuration"""
-        return {
-            "greeting": {
-                "patterns": [
-                    r"hi|hello|hey|greetings",
-                    r"good (morning|afternoon|evening)",
-                    r"how are you"
-                ],
-                "responses": [
-                    "Hello! How can I help you today?",
-                    "Hi there! What can I do for you?",
-                    "Greetings! How may I assist you?"
-                ]
-            },
-            "appointment": {
-                "patterns": [
-                    r"schedule|book|make an appointment",
-                    r"when is my (next )?appointment",
-                    r"reschedule|change appointment",
-                    r"cancel appointment"
-                ],
-                "responses": {
-                    "schedule": "I'll help you schedule an appointment. What type of appointment do you need?",
-                    "check": "Let me check your upcoming appointments.",
-                    "reschedule": "I'll help you reschedule your appointment. Which appointment would you like to change?",
-                    "cancel": "I'll help you cancel your appointment. Which appointment would you like to cancel?"
-                }
-            },
-            "medication": {
-                "patterns": [
-                    r"medication|medicine|prescription",
-                    r"when to take|dosage|how many",
-                    r"side effects|reactions",
-                    r"refill|renew prescription"
-                ],
-                "responses": {
-                    "info": "Let me check your medication information.",
-                    "dosage": "Here's your medication schedule:",
-                    "side_effects": "Here are the possible side effects:",
-                    "refill": "I'll help you request a prescription refill."
-                }
-            },
-            "emergency": {
-                "patterns": [
-                    r"emergency|urgent|immediate",
-                    r"severe pain|bleeding|fever",
-                    r"can't breathe|chest pain"
-                ],
-                "responses": [
-                    "This seems urgent. Please call emergency services immediately.",
-                    "For emergencies, please call 911 or go to the nearest emergency room.",
-                    "This requires immediate medical attention. Please seek emergency care."
-                ]
-            },
-            "general_info": {
-                "patterns": [
-                    r"clinic hours|opening times",
-                    r"location|address|directions",
-                    r"contact|phone number|email",
-                    r"insurance|coverage|payment"
-                ],
-                "responses": {
-                    "hours": "Our clinic hours are Monday to Friday, 9 AM to 5 PM.",
-                    "location": "We are located at 123 Medical Center Drive.",
-                    "contact": "You can reach us at (555) 123-4567 or info@clinic.com",
-                    "insurance": "We accept most major insurance providers. Would you like to check your coverage?"
-                }
-            },
-            "feedback": {
-                "patterns": [
-                    r"feedback|review|rating",
-                    r"complaint|issue|problem",
-                    r"suggestion|improve|better"
-                ],
-                "responses": [
-                    "Thank you for your feedback. We'll use it to improve our services.",
-                    "I'm sorry to hear about your experience. Let me help you with that.",
-                    "Your feedback is valuable to us. Thank you for sharing."
-                ]
-            }
+        self._notification_buffer: List[Dict[str, Any]] = []
+        self._notification_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        # Bind the response tables once for the handlers
+        self._greeting_responses = self.intents["greeting"]["responses"]
+        self._appointment_responses = self.intents["appointment"]["responses"]
+        self._medication_responses = self.intents["medication"]["responses"]
+        self._emergency_responses = self.intents["emergency"]["responses"]
+        self._general_info_responses = self.intents["general_info"]["responses"]
+        self._feedback_responses = self.intents["feedback"]["responses"]
+        self._choice = random.choice
+        # Intent -> handler dispatch table
+        self._handlers = {
+            "greeting": self._handle_greeting_intent,
+            "appointment": self._handle_appointment_intent,
+            "medication": self._handle_medication_intent,
+            "emergency": self._handle_emergency_intent,
+            "general_info": self._handle_general_info_intent,
+            "feedback": self._handle_feedback_intent
         }
 
     async def process_message(
@@ -110,7 +247,7 @@ class ChatbotService:
         """Process incoming message and generate response"""
         try:
             # Get patient context
-            patient = self.db.query(Patient).filter(Patient.id == patient_id).first()
+            patient = self.db.get(Patient, patient_id)
             if not patient:
                 return {
                     "response": "I'm sorry, I couldn't find your patient record.",
@@ -118,7 +255,9 @@ class ChatbotService:
                 }
 
             # Detect intent
-            intent = self._detect_intent(message)
+            # Lower-case once; intent and sub-intent matching both use this form
+            normalized = message.lower()
+            intent = self._detect_intent(normalized)
             if not intent:
                 return {
                     "response": "I'm not sure I understand. Could you please rephrase?",
@@ -126,41 +265,95 @@ class ChatbotService:
                 }
 
             # Generate response based on intent
-            response = await self._generate_response(intent, message, patient)
-            
-            # Create notification record
-            notification = NotificationCreate(
-                patient_id=patient_id,
-                channel=channel,
-                message=message,
-                response=response["response"],
-                status="processed",
-                metadata={
-                    "intent": intent,
-                    "action": response.get("action"),
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-            )
+            response = await self._generate_response(intent, normalized, patient)
             
-            # Save notification
-            self.db.add(Notification(**notification.dict()))
-            self.db.commit()
+            # Buffer the notification row; rows are written in batches
+            self._buffer_notification(patient_id, channel, message, intent, response)
             
             return response
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}")
             raise
 
+    def _buffer_notification(
+        self,
+        patient_id: int,
+        channel: str,
+        message: str,
+        intent: Optional[str],
+        response: Dict[str, Any]
+    ) -> None:
+        """Queue the conversation's notification row for the next batch INSERT.
+
+        The row is built server-side, so it skips NotificationCreate
+        validation, and its metadata is encoded by the engine's orjson
+        serializer.
+        """
+        user_id = settings.CHATBOT_NOTIFICATION_USER_ID
+        if user_id is None:
+            return
+        try:
+            notification_channel = NotificationChannel(channel)
+        except ValueError:
+            logger.warning(f"Not recording chatbot message on unknown channel {channel!r}")
+            return
+        now = _utcnow()
+        self._notification_buffer.append({
+            "user_id": user_id,
+            "notification_type": NotificationType.CUSTOM,
+            "channel": notification_channel,
+            "subject": "Chatbot response",
+            "content": response["response"],
+            "status": NotificationStatus.RESPONDED,
+            "sent_at": now,
+            "metadata": {
+                "patient_id": patient_id,
+                "message": message,
+                "intent": intent,
+                "action": response.get("action"),
+                "timestamp": now.isoformat()
+            }
+        })
+        overflow = len(self._notification_buffer) - NOTIFICATION_BUFFER_LIMIT
+        if overflow > 0:
+            logger.warning(f"Notification buffer full; dropping {overflow} oldest rows")
+            del self._notification_buffer[:overflow]
+        _services_with_pending.add(self)
+        if len(self._notification_buffer) >= NOTIFICATION_BATCH_SIZE:
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self.flush_notifications())
+        elif self._flush_task is None or self._flush_task.done():
+            # Write a partial batch even if no further message arrives
+            self._flush_task = asyncio.create_task(self._flush_after_interval())
+
+    async def flush_notifications(self) -> None:
+        """Write buffered notification records in a single INSERT.
+
+        A batch that fails to insert is logged and dropped rather than
+        retried, so a bad row cannot hold the buffer or fail later messages.
+        """
+        async with self._notification_lock:
+            if not self._notification_buffer:
+                return
+            batch = list(self._notification_buffer)
+            self._notification_buffer.clear()
+            _services_with_pending.discard(self)
+            try:
+                self.db.execute(Notification.__table__.insert(), batch)
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                logger.error(f"Error flushing notifications, dropped {len(batch)} rows: {str(e)}")
+                logger.error(f"Dropped notification rows: {batch!r}")
+
+    async def _flush_after_interval(self) -> None:
+        """Flush the buffer once NOTIFICATION_FLUSH_INTERVAL has passed"""
+        await asyncio.sleep(NOTIFICATION_FLUSH_INTERVAL)
+        await self.flush_notifications()
+
     def _detect_intent(self, message: str) -> Optional[str]:
-        """Detect intent from message"""
-        message = message.lower()
-        
-        for intent, data in self.intents.items():
-            for pattern in data["patterns"]:
-                if re.search(pattern, message):
-                    return intent
-        
-        return None
+        """Detect intent from a lower-cased message"""
+        return _detect_intent_cached(message)
 
     async def _generate_response(
         self,
@@ -170,42 +363,40 @@ class ChatbotService:
     ) -> Dict[str, Any]:
         """Generate response based on intent"""
         try:
-            if intent == "greeting":
-                return {
-                    "response": self._get_random_response(self.intents["greeting"]["responses"]),
-                    "action": None
-                }
-            
-            elif intent == "appointment":
-                return await self._handle_appointment_intent(message, patient)
-            
-            elif intent == "medication":
-                return await self._handle_medication_intent(message, patient)
-            
-            elif intent == "emergency":
-                return {
-                    "response": self._get_random_response(self.intents["emergency"]["responses"]),
-                    "action": "emergency_alert"
-                }
-            
-            elif intent == "general_info":
-                return await self._handle_general_info_intent(message)
-            
-            elif intent == "feedback":
-                return {
-                    "response": self._get_random_response(self.intents["feedback"]["responses"]),
-                    "action": "store_feedback"
-                }
-            
-            else:
-                return {
-                    "response": "I'm not sure how to help with that. Would you like to speak with a staff member?",
-                    "action": "transfer_to_staff"
-                }
+            handler = self._handlers.get(intent, self._handle_unknown_intent)
+            return await handler(message, patient)
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             raise
 
+    async def _handle_greeting_intent(self, message: str, patient: Patient) -> Dict[str, Any]:
+        """Handle greeting intents"""
+        return {
+            "response": self._choice(self._greeting_responses),
+            "action": None
+        }
+
+    async def _handle_emergency_intent(self, message: str, patient: Patient) -> Dict[str, Any]:
+        """Handle emergency intents"""
+        return {
+            "response": self._choice(self._emergency_responses),
+            "action": "emergency_alert"
+        }
+
+    async def _handle_feedback_intent(self, message: str, patient: Patient) -> Dict[str, Any]:
+        """Handle feedback intents"""
+        return {
+            "response": self._choice(self._feedback_responses),
+            "action": "store_feedback"
+        }
+
+    async def _handle_unknown_intent(self, message: str, patient: Patient) -> Dict[str, Any]:
+        """Handle intents without a dedicated handler"""
+        return {
+            "response": "I'm not sure how to help with that. Would you like to speak with a staff member?",
+            "action": "transfer_to_staff"
+        }
+
     async def _handle_appointment_intent(
         self,
         message: str,
@@ -213,15 +404,15 @@ class ChatbotService:
     ) -> Dict[str, Any]:
         """Handle appointment-related intents"""
         try:
-            message = message.lower()
-            
-            if "schedule" in message or "book" in message:
+            match = _APPOINTMENT_KEYWORDS.search(message)
+            if not match:
                 return {
-                    "response": self.intents["appointment"]["responses"]["schedule"],
-                    "action": "schedule_appointment"
+                    "response": "I can help you schedule, check, reschedule, or cancel appointments. What would you like to do?",
+                    "action": None
                 }
-            
-            elif "when" in message or "next" in message:
+
+            key, action = _APPOINTMENT_DISPATCH[match.group()]
+            if key == "check":
                 # Get next appointment
                 next_appointment = self.db.query(FollowUpSchedule)\
                     .filter(FollowUpSchedule.patient_id == patient.id)\
@@ -239,24 +430,11 @@ class ChatbotService:
                         "response": "You don't have any upcoming appointments.",
                         "action": None
                     }
-            
-            elif "reschedule" in message or "change" in message:
-                return {
-                    "response": self.intents["appointment"]["responses"]["reschedule"],
-                    "action": "reschedule_appointment"
-                }
-            
-            elif "cancel" in message:
-                return {
-                    "response": self.intents["appointment"]["responses"]["cancel"],
-                    "action": "cancel_appointment"
-                }
-            
-            else:
-                return {
-                    "response": "I can help you schedule, check, reschedule, or cancel appointments. What would you like to do?",
-                    "action": None
-                }
+
+            return {
+                "response": self._appointment_responses[key],
+                "action": action
+            }
         except Exception as e:
             logger.error(f"Error handling appointment intent: {str(e)}")
             raise
@@ -268,81 +446,45 @@ class ChatbotService:
     ) -> Dict[str, Any]:
         """Handle medication-related intents"""
         try:
-            message = message.lower()
-            
-            if "when" in message or "dosage" in message:
-                return {
-                    "response": self.intents["medication"]["responses"]["dosage"],
-                    "action": "get_medication_schedule"
-                }
-            
-            elif "side" in message or "effect" in message:
-                return {
-                    "response": self.intents["medication"]["responses"]["side_effects"],
-                    "action": "get_medication_info"
-                }
-            
-            elif "refill" in message or "renew" in message:
-                return {
-                    "response": self.intents["medication"]["responses"]["refill"],
-                    "action": "request_refill"
-                }
-            
-            else:
+            match = _MEDICATION_KEYWORDS.search(message)
+            if not match:
                 return {
                     "response": "I can help you with medication schedules, side effects, or prescription refills. What would you like to know?",
                     "action": None
                 }
+
+            key, action = _MEDICATION_DISPATCH[match.group()]
+            return {
+                "response": self._medication_responses[key],
+                "action": action
+            }
         except Exception as e:
             logger.error(f"Error handling medication intent: {str(e)}")
             raise
 
     async def _handle_general_info_intent(
         self,
-        message: str
+        message: str,
+        patient: Patient
     ) -> Dict[str, Any]:
         """Handle general information intents"""
         try:
-            message = message.lower()
-            
-            if "hour" in message or "time" in message:
-                return {
-                    "response": self.intents["general_info"]["responses"]["hours"],
-                    "action": None
-                }
-            
-            elif "location" in message or "address" in message:
-                return {
-                    "response": self.intents["general_info"]["responses"]["location"],
-                    "action": "send_location"
-                }
-            
-            elif "contact" in message or "phone" in message:
-                return {
-                    "response": self.intents["general_info"]["responses"]["contact"],
-                    "action": None
-                }
-            
-            elif "insurance" in message or "coverage" in message:
-                return {
-                    "response": self.intents["general_info"]["responses"]["insurance"],
-                    "action": "check_insurance"
-                }
-            
-            else:
+            match = _GENERAL_INFO_KEYWORDS.search(message)
+            if not match:
                 return {
                     "response": "I can provide information about our hours, location, contact details, or insurance coverage. What would you like to know?",
                     "action": None
                 }
+
+            key, action = _GENERAL_INFO_DISPATCH[match.group()]
+            return {
+                "response": self._general_info_responses[key],
+                "action": action
+            }
         except Exception as e:
             logger.error(f"Error handling general info intent: {str(e)}")
             raise
 
-    def _get_random_response(self, responses: List[str]) -> str:
-        """Get a random response from the list"""
-        import random
-        return random.choice(responses)
-
     async def store_feedback(
         self,
         patient_id: str,
@@ -356,11 +498,11 @@ class ChatbotService:
                 "patient_id": patient_id,
                 "feedback": feedback,
                 "rating": rating,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": _utcnow().isoformat()
             }
             
             # TODO: Implement feedback storage
-            logger.info(f"Storing feedback: {json.dumps(feedback_data)}")
+            logger.info("Storing feedback: %s", feedback_data)
         except Exception as e:
             logger.error(f"Error storing feedback: {str(e)}")
             raise
@@ -376,11 +518,18 @@ class ChatbotService:
             transfer_data = {
                 "patient_id": patient_id,
                 "reason": reason,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": _utcnow().isoformat()
             }
             
             # TODO: Implement staff transfer logic
-            logger.info(f"Transferring to staff: {json.dumps(transfer_data)}")
+            logger.info("Transferring to staff: %s", transfer_data)
         except Exception as e:
             logger.error(f"Error transferring to staff: {str(e)}")
-            raise 
\ No newline at end of file
+            raise 
+
+async def flush_pending_notifications() -> None:
+    """Write every service's buffered notification rows, e.g. on shutdown"""
+    for service in list(_services_with_pending):
+        if service._flush_task is not None:
+            service._flush_task.cancel()
+        await service.flush_notifications()
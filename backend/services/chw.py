@@ -1,8 +1,9 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 import json
+from functools import lru_cache
 
 from ..models.chw import (
     CHW,
@@ -25,11 +26,16 @@ from ..schemas.chw import (
     TrainingCreate
 )
 
+@lru_cache(maxsize=None)
+def _column_names(model) -> frozenset:
+    """Column names of a model's table, computed once per model."""
+    return frozenset(model.__table__.columns.keys())
+
 class CHWService:
     def __init__(self):
         pass
 
-    async def create_chw(self, db: Session, chw_data: Dict[str, Any]) -> CHW:
+    def create_chw(self, db: Session, chw_data: Dict[str, Any]) -> CHW:
         """Create a new CHW."""
         chw = CHW(**chw_data)
         db.add(chw)
@@ -37,24 +43,15 @@ class CHWService:
         db.refresh(chw)
         return chw
 
-    async def get_chw(self, db: Session, chw_id: int) -> Optional[CHW]:
+    def get_chw(self, db: Session, chw_id: int) -> Optional[CHW]:
         """Get a CHW by ID."""
         return db.query(CHW).filter(CHW.id == chw_id).first()
 
-    async def update_chw(self, db: Session, chw_id: int, chw_data: Dict[str, Any]) -> Optional[CHW]:
+    def update_chw(self, db: Session, chw_id: int, chw_data: Dict[str, Any]) -> Optional[CHW]:
         """Update a CHW's information."""
-        chw = await self.get_chw(db, chw_id)
-        if not chw:
-            return None
-
-        for key, value in chw_data.items():
-            setattr(chw, key, value)
-
-        db.commit()
-        db.refresh(chw)
-        return chw
+        return self._update_by_id(db, CHW, chw_id, chw_data)
 
-    async def create_visit(self, db: Session, visit_data: Dict[str, Any]) -> CHWVisit:
+    def create_visit(self, db: Session, visit_data: Dict[str, Any]) -> CHWVisit:
         """Create a new CHW visit."""
         visit = CHWVisit(**visit_data)
         db.add(visit)
@@ -62,20 +59,11 @@ class CHWService:
         db.refresh(visit)
         return visit
 
-    async def update_visit(self, db: Session, visit_id: int, visit_data: Dict[str, Any]) -> Optional[CHWVisit]:
+    def update_visit(self, db: Session, visit_id: int, visit_data: Dict[str, Any]) -> Optional[CHWVisit]:
         """Update a CHW visit."""
-        visit = db.query(CHWVisit).filter(CHWVisit.id == visit_id).first()
-        if not visit:
-            return None
+        return self._update_by_id(db, CHWVisit, visit_id, visit_data)
 
-        for key, value in visit_data.items():
-            setattr(visit, key, value)
-
-        db.commit()
-        db.refresh(visit)
-        return visit
-
-    async def get_visits(
+    def get_visits(
         self,
         db: Session,
         chw_id: Optional[int] = None,
@@ -83,10 +71,15 @@ class CHWService:
         status: Optional[VisitStatus] = None,
         visit_type: Optional[VisitType] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        columns: Optional[List[Any]] = None
     ) -> List[CHWVisit]:
-        """Get CHW visits with filters."""
-        query = db.query(CHWVisit)
+        """Get CHW visits with filters.
+
+        Pass ``columns`` (e.g. ``[CHWVisit.status, CHWVisit.patient_id]``) to get
+        lightweight rows with just those columns instead of full ORM objects.
+        """
+        query = db.query(*columns) if columns else db.query(CHWVisit)
 
         if chw_id:
             query = query.filter(CHWVisit.chw_id == chw_id)
@@ -103,7 +96,7 @@ class CHWService:
 
         return query.all()
 
-    async def create_assignment(self, db: Session, assignment_data: Dict[str, Any]) -> CHWAssignment:
+    def create_assignment(self, db: Session, assignment_data: Dict[str, Any]) -> CHWAssignment:
         """Create a new CHW assignment."""
         assignment = CHWAssignment(**assignment_data)
         db.add(assignment)
@@ -111,20 +104,11 @@ class CHWService:
         db.refresh(assignment)
         return assignment
 
-    async def update_assignment(self, db: Session, assignment_id: int, assignment_data: Dict[str, Any]) -> Optional[CHWAssignment]:
+    def update_assignment(self, db: Session, assignment_id: int, assignment_data: Dict[str, Any]) -> Optional[CHWAssignment]:
         """Update a CHW assignment."""
-        assignment = db.query(CHWAssignment).filter(CHWAssignment.id == assignment_id).first()
-        if not assignment:
-            return None
-
-        for key, value in assignment_data.items():
-            setattr(assignment, key, value)
-
-        db.commit()
-        db.refresh(assignment)
-        return assignment
+        return self._update_by_id(db, CHWAssignment, assignment_id, assignment_data)
 
-    async def get_assignments(
+    def get_assignments(
         self,
         db: Session,
         chw_id: Optional[int] = None,
@@ -151,7 +135,7 @@ class CHWService:
 
         return query.all()
 
-    async def create_performance(self, db: Session, performance_data: Dict[str, Any]) -> CHWPerformance:
+    def create_performance(self, db: Session, performance_data: Dict[str, Any]) -> CHWPerformance:
         """Create new CHW performance metrics."""
         performance = CHWPerformance(**performance_data)
         db.add(performance)
@@ -159,20 +143,11 @@ class CHWService:
         db.refresh(performance)
         return performance
 
-    async def update_performance(self, db: Session, performance_id: int, performance_data: Dict[str, Any]) -> Optional[CHWPerformance]:
+    def update_performance(self, db: Session, performance_id: int, performance_data: Dict[str, Any]) -> Optional[CHWPerformance]:
         """Update CHW performance metrics."""
-        performance = db.query(CHWPerformance).filter(CHWPerformance.id == performance_id).first()
-        if not performance:
-            return None
-
-        for key, value in performance_data.items():
-            setattr(performance, key, value)
-
-        db.commit()
-        db.refresh(performance)
-        return performance
+        return self._update_by_id(db, CHWPerformance, performance_id, performance_data)
 
-    async def get_performance(
+    def get_performance(
         self,
         db: Session,
         chw_id: int,
@@ -189,7 +164,7 @@ class CHWService:
 
         return query.order_by(CHWPerformance.metric_date.desc()).all()
 
-    async def create_training(self, db: Session, training_data: Dict[str, Any]) -> CHWTraining:
+    def create_training(self, db: Session, training_data: Dict[str, Any]) -> CHWTraining:
         """Create a new CHW training record."""
         training = CHWTraining(**training_data)
         db.add(training)
@@ -197,20 +172,11 @@ class CHWService:
         db.refresh(training)
         return training
 
-    async def update_training(self, db: Session, training_id: int, training_data: Dict[str, Any]) -> Optional[CHWTraining]:
+    def update_training(self, db: Session, training_id: int, training_data: Dict[str, Any]) -> Optional[CHWTraining]:
         """Update a CHW training record."""
-        training = db.query(CHWTraining).filter(CHWTraining.id == training_id).first()
-        if not training:
-            return None
+        return self._update_by_id(db, CHWTraining, training_id, training_data)
 
-        for key, value in training_data.items():
-            setattr(training, key, value)
-
-        db.commit()
-        db.refresh(training)
-        return training
-
-    async def get_training(
+    def get_training(
         self,
         db: Session,
         chw_id: int,
@@ -232,7 +198,7 @@ class CHWService:
 
         return query.order_by(CHWTraining.start_date.desc()).all()
 
-    async def get_chw_stats(
+    def get_chw_stats(
         self,
         db: Session,
         chw_id: int,
@@ -245,14 +211,22 @@ class CHWService:
         if not end_date:
             end_date = datetime.utcnow()
 
-        # Get visit statistics
-        visits = await self.get_visits(db, chw_id=chw_id, start_date=start_date, end_date=end_date)
-        total_visits = len(visits)
-        completed_visits = len([v for v in visits if v.status == VisitStatus.COMPLETED])
-        pending_visits = len([v for v in visits if v.status in [VisitStatus.SCHEDULED, VisitStatus.IN_PROGRESS]])
+        # Get visit statistics in one aggregate query
+        visit_stats = db.query(
+            func.count(CHWVisit.id).label("total"),
+            func.sum(case((CHWVisit.status == VisitStatus.COMPLETED, 1), else_=0)).label("completed"),
+            func.sum(case(
+                (CHWVisit.status.in_([VisitStatus.SCHEDULED, VisitStatus.IN_PROGRESS]), 1),
+                else_=0
+            )).label("pending"),
+            func.count(CHWVisit.patient_id.distinct()).label("patients")
+        ).filter(
+            CHWVisit.chw_id == chw_id,
+            CHWVisit.scheduled_date.between(start_date, end_date)
+        ).one()
 
         # Get performance metrics
-        performance = await self.get_performance(db, chw_id, start_date, end_date)
+        performance = self.get_performance(db, chw_id, start_date, end_date)
         if performance:
             latest_performance = performance[0]
             average_response_time = latest_performance.average_response_time
@@ -264,21 +238,33 @@ class CHWService:
             compliance_rate = 0.0
 
         # Get recent and upcoming visits
-        recent_visits = visits[:5]  # Last 5 visits
-        upcoming_visits = [v for v in visits if v.status == VisitStatus.SCHEDULED][:5]  # Next 5 scheduled visits
-
-        # Calculate performance trend
+        window = db.query(CHWVisit).filter(
+            CHWVisit.chw_id == chw_id,
+            CHWVisit.scheduled_date.between(start_date, end_date)
+        )
+        recent_visits = window.order_by(CHWVisit.scheduled_date.desc()).limit(5).all()  # Last 5 visits
+        upcoming_visits = window.filter(CHWVisit.status == VisitStatus.SCHEDULED)\
+            .order_by(CHWVisit.scheduled_date.asc()).limit(5).all()  # Next 5 scheduled visits
+
+        # Calculate performance trend in a single pass
+        visits_trend, satisfaction_trend, compliance_trend = [], [], []
+        for p in performance:
+            visits_trend.append(p.visits_completed)
+            if p.patient_satisfaction:
+                satisfaction_trend.append(p.patient_satisfaction)
+            if p.compliance_rate:
+                compliance_trend.append(p.compliance_rate)
         performance_trend = {
-            "visits_completed": [p.visits_completed for p in performance],
-            "patient_satisfaction": [p.patient_satisfaction for p in performance if p.patient_satisfaction],
-            "compliance_rate": [p.compliance_rate for p in performance if p.compliance_rate]
+            "visits_completed": visits_trend,
+            "patient_satisfaction": satisfaction_trend,
+            "compliance_rate": compliance_trend
         }
 
         return {
-            "total_visits": total_visits,
-            "completed_visits": completed_visits,
-            "pending_visits": pending_visits,
-            "patients_served": len(set(v.patient_id for v in visits)),
+            "total_visits": visit_stats.total,
+            "completed_visits": visit_stats.completed or 0,
+            "pending_visits": visit_stats.pending or 0,
+            "patients_served": visit_stats.patients,
             "average_response_time": average_response_time,
             "patient_satisfaction": patient_satisfaction,
             "compliance_rate": compliance_rate,
@@ -287,5 +273,21 @@ class CHWService:
             "performance_trend": performance_trend
         }
 
+    def _update_by_id(self, db: Session, model, record_id: int, data: Dict[str, Any]):
+        """Apply a partial update as a single UPDATE and return the fresh row.
+
+        Keys that are not columns of the model are ignored. Returns None when no
+        row matches.
+        """
+        columns = _column_names(model)
+        values = {key: value for key, value in data.items() if key in columns}
+        if values:
+            updated = db.query(model).filter(model.id == record_id)\
+                .update(values, synchronize_session=False)
+            db.commit()
+            if not updated:
+                return None
+        return db.get(model, record_id)
+
 # Create a singleton instance
 chw_service = CHWService() 
\ No newline at end of file
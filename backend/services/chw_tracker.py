@@ -1,8 +1,9 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc
-import math
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, and_, or_, desc, case, select, text, cast, Numeric, lambda_stmt
+import numpy as np
+from scipy.spatial import ConvexHull, QhullError
 import logging
 
 from ..models.chw_tracker import (
@@ -11,8 +12,12 @@ from ..models.chw_tracker import (
     CHWLocationTracking,
     CHWPerformanceMetrics,
     VisitStatus,
-    ActivityType
+    ActivityType,
+    CHW_DAILY_VISIT_STATS_VIEW,
+    chw_daily_visit_stats,
+    chw_stats_summary
 )
+from ..database import commit_keep_loaded
 from ..schemas.chw_tracker import (
     CHWFieldVisitCreate,
     CHWFieldVisitUpdate,
@@ -43,8 +48,7 @@ class CHWTrackerService:
                 chw_id=chw_id
             )
             self.db.add(visit)
-            self.db.commit()
-            self.db.refresh(visit)
+            commit_keep_loaded(self.db)
             return visit
         except Exception as e:
             self.db.rollback()
@@ -86,20 +90,23 @@ class CHWTrackerService:
     ) -> List[CHWFieldVisit]:
         """Get field visits with optional filters."""
         try:
-            query = self.db.query(CHWFieldVisit)
+            # Lambda statements are cached by code location, so each filter
+            # combination compiles once and later calls only rebind values
+            stmt = lambda_stmt(lambda: select(CHWFieldVisit))
 
             if chw_id:
-                query = query.filter(CHWFieldVisit.chw_id == chw_id)
+                stmt += lambda s: s.where(CHWFieldVisit.chw_id == chw_id)
             if patient_id:
-                query = query.filter(CHWFieldVisit.patient_id == patient_id)
+                stmt += lambda s: s.where(CHWFieldVisit.patient_id == patient_id)
             if status:
-                query = query.filter(CHWFieldVisit.status == status)
+                stmt += lambda s: s.where(CHWFieldVisit.status == status)
             if start_date:
-                query = query.filter(CHWFieldVisit.visit_date >= start_date)
+                stmt += lambda s: s.where(CHWFieldVisit.visit_date >= start_date)
             if end_date:
-                query = query.filter(CHWFieldVisit.visit_date <= end_date)
+                stmt += lambda s: s.where(CHWFieldVisit.visit_date <= end_date)
 
-            return query.order_by(desc(CHWFieldVisit.visit_date)).all()
+            stmt += lambda s: s.order_by(desc(CHWFieldVisit.visit_date))
+            return self.db.scalars(stmt).all()
         except Exception as e:
             logger.error(f"Error getting field visits: {str(e)}")
             raise
@@ -112,8 +119,7 @@ class CHWTrackerService:
         try:
             activity = CHWActivity(**activity_data.dict())
             self.db.add(activity)
-            self.db.commit()
-            self.db.refresh(activity)
+            commit_keep_loaded(self.db)
             return activity
         except Exception as e:
             self.db.rollback()
@@ -153,14 +159,29 @@ class CHWTrackerService:
         try:
             location = CHWLocationTracking(**location_data.dict())
             self.db.add(location)
-            self.db.commit()
-            self.db.refresh(location)
+            commit_keep_loaded(self.db)
             return location
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error tracking location: {str(e)}")
             raise
 
+    async def bulk_track_locations(
+        self,
+        locations: List[CHWLocationTrackingCreate]
+    ) -> int:
+        """Track a batch of CHW location points in one INSERT and commit."""
+        try:
+            mappings = [location.dict() for location in locations]
+            if mappings:
+                self.db.bulk_insert_mappings(CHWLocationTracking, mappings)
+                self.db.commit()
+            return len(mappings)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error tracking locations: {str(e)}")
+            raise
+
     async def get_visit_stats(
         self,
         chw_id: int,
@@ -169,42 +190,42 @@ class CHWTrackerService:
     ) -> CHWVisitStats:
         """Get statistics for CHW visits."""
         try:
-            query = self.db.query(CHWFieldVisit).filter(
-                CHWFieldVisit.chw_id == chw_id
-            )
-
+            filters = [CHWFieldVisit.chw_id == chw_id]
             if start_date:
-                query = query.filter(CHWFieldVisit.visit_date >= start_date)
+                filters.append(CHWFieldVisit.visit_date >= start_date)
             if end_date:
-                query = query.filter(CHWFieldVisit.visit_date <= end_date)
-
-            visits = query.all()
-            
-            # Calculate statistics
-            total_visits = len(visits)
-            visits_by_status = {}
-            visits_by_type = {}
-            total_duration = 0
-            completed_visits = 0
-            verified_visits = 0
-
-            for visit in visits:
-                # Count by status
-                status = visit.status.value
-                visits_by_status[status] = visits_by_status.get(status, 0) + 1
-
-                # Count by type
-                visit_type = visit.visit_type.value
-                visits_by_type[visit_type] = visits_by_type.get(visit_type, 0) + 1
-
-                # Calculate duration
-                if visit.start_time and visit.end_time:
-                    duration = (visit.end_time - visit.start_time).total_seconds() / 60
-                    total_duration += duration
-                    completed_visits += 1
-
-                if visit.is_verified:
-                    verified_visits += 1
+                filters.append(CHWFieldVisit.visit_date <= end_date)
+
+            if self.db.get_bind().dialect.name == "postgresql":
+                if start_date or end_date:
+                    return self._visit_stats_from_view(chw_id, start_date, end_date, filters)
+                return self._visit_stats_from_summary(chw_id, filters)
+
+            # Count by status and by type
+            visits_by_status, visits_by_type = self._visit_breakdowns(filters)
+
+            # Totals, timed visits and their duration in minutes
+            duration = (
+                func.extract("epoch", CHWFieldVisit.end_time)
+                - func.extract("epoch", CHWFieldVisit.start_time)
+            ) / 60
+            totals = self.db.query(
+                func.count(CHWFieldVisit.id).label("total"),
+                func.count(duration).label("completed"),
+                func.coalesce(func.sum(duration), 0).label("duration"),
+                func.sum(case((CHWFieldVisit.is_verified, 1), else_=0)).label("verified")
+            ).filter(*filters).one()
+            total_visits = totals.total
+            completed_visits = totals.completed
+            total_duration = float(totals.duration)
+            verified_visits = totals.verified or 0
+
+            # Visits are still loaded for the distance calculation, with their
+            # tracks fetched in one extra query rather than one per visit
+            visits = self.db.query(CHWFieldVisit)\
+                .options(selectinload(CHWFieldVisit.location_tracking))\
+                .filter(*filters)\
+                .all()
 
             return CHWVisitStats(
                 total_visits=total_visits,
@@ -219,6 +240,135 @@ class CHWTrackerService:
             logger.error(f"Error getting visit stats: {str(e)}")
             raise
 
+    def _visit_breakdowns(self, filters: List[Any]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Visit counts grouped by status and by type."""
+        visits_by_status = {
+            status.value: count
+            for status, count in self.db.query(
+                CHWFieldVisit.status, func.count(CHWFieldVisit.id)
+            ).filter(*filters).group_by(CHWFieldVisit.status)
+            if status is not None
+        }
+        visits_by_type = {
+            visit_type.value: count
+            for visit_type, count in self.db.query(
+                CHWFieldVisit.visit_type, func.count(CHWFieldVisit.id)
+            ).filter(*filters).group_by(CHWFieldVisit.visit_type)
+        }
+        return visits_by_status, visits_by_type
+
+    def _visit_stats_from_summary(self, chw_id: int, filters: List[Any]) -> CHWVisitStats:
+        """Build all-time visit statistics from the trigger-maintained summary row.
+
+        Totals are exact as of the last committed visit write; only the
+        status/type breakdowns and the distance are computed per call, both
+        in the database over the same live rows.
+        """
+        summary = self.db.execute(
+            select(chw_stats_summary).where(chw_stats_summary.c.chw_id == chw_id)
+        ).first()
+        total_visits = summary.total_visits if summary else 0
+        completed_visits = summary.completed_visits if summary else 0
+        verified_visits = summary.verified_visits if summary else 0
+        total_duration = float(summary.total_duration_min) if summary else 0.0
+
+        visits_by_status, visits_by_type = self._visit_breakdowns(filters)
+
+        return CHWVisitStats(
+            total_visits=total_visits,
+            visits_by_status=visits_by_status,
+            visits_by_type=visits_by_type,
+            average_visit_duration=total_duration / completed_visits if completed_visits > 0 else 0,
+            total_distance=self._visit_distance_sql(filters),
+            completion_rate=completed_visits / total_visits if total_visits > 0 else 0,
+            verification_rate=verified_visits / total_visits if total_visits > 0 else 0
+        )
+
+    def _visit_stats_from_view(
+        self,
+        chw_id: int,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        filters: List[Any]
+    ) -> CHWVisitStats:
+        """Build visit statistics from the daily roll-up view.
+
+        The window is applied at day granularity: every day that overlaps
+        [start_date, end_date] is counted in full, distance included.
+        """
+        stats = chw_daily_visit_stats.c
+        conditions = [stats.chw_id == chw_id]
+        if start_date:
+            conditions.append(stats.day >= func.date_trunc("day", start_date))
+        if end_date:
+            conditions.append(stats.day <= end_date)
+
+        total_visits = completed_visits = verified_visits = 0
+        total_duration = total_distance = 0.0
+        visits_by_status = {}
+        visits_by_type = {}
+        for row in self.db.execute(select(chw_daily_visit_stats).where(*conditions)):
+            if row.status is not None:
+                visits_by_status[row.status.value] = visits_by_status.get(row.status.value, 0) + row.visits
+            visits_by_type[row.visit_type.value] = visits_by_type.get(row.visit_type.value, 0) + row.visits
+            total_visits += row.visits
+            completed_visits += row.timed_visits
+            verified_visits += row.verified_visits
+            total_duration += row.duration_minutes
+            total_distance += row.distance_km
+
+        return CHWVisitStats(
+            total_visits=total_visits,
+            visits_by_status=visits_by_status,
+            visits_by_type=visits_by_type,
+            average_visit_duration=total_duration / completed_visits if completed_visits > 0 else 0,
+            total_distance=total_distance,
+            completion_rate=completed_visits / total_visits if total_visits > 0 else 0,
+            verification_rate=verified_visits / total_visits if total_visits > 0 else 0
+        )
+
+    def _visit_distance_sql(self, filters: List[Any]) -> float:
+        """Track distance (km) over the filtered visits, summed in the database.
+
+        Each point is paired with the previous point of the same visit via
+        lag(), as _calculate_total_distance does per visit in Python.
+        """
+        legs = select(
+            CHWLocationTracking.latitude.label("lat"),
+            CHWLocationTracking.longitude.label("lon"),
+            func.lag(CHWLocationTracking.latitude).over(
+                partition_by=CHWLocationTracking.visit_id,
+                order_by=CHWLocationTracking.timestamp
+            ).label("prev_lat"),
+            func.lag(CHWLocationTracking.longitude).over(
+                partition_by=CHWLocationTracking.visit_id,
+                order_by=CHWLocationTracking.timestamp
+            ).label("prev_lon")
+        ).join(CHWFieldVisit).where(*filters).subquery()
+
+        dlat = func.radians(legs.c.lat - legs.c.prev_lat)
+        dlon = func.radians(legs.c.lon - legs.c.prev_lon)
+        a = func.power(func.sin(dlat / 2), 2) + (
+            func.cos(func.radians(legs.c.prev_lat))
+            * func.cos(func.radians(legs.c.lat))
+            * func.power(func.sin(dlon / 2), 2)
+        )
+        distance = 2 * 6371 * func.asin(func.sqrt(a))  # Earth's radius in km
+
+        return float(self.db.scalar(select(func.coalesce(func.sum(distance), 0))))
+
+    def refresh_stats_views(self) -> None:
+        """Refresh the visit roll-up view without blocking readers."""
+        if self.db.get_bind().dialect.name != "postgresql":
+            return
+        try:
+            self.db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {CHW_DAILY_VISIT_STATS_VIEW}"))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error refreshing stats views: {str(e)}")
+            raise
+
     async def get_activity_stats(
         self,
         chw_id: int,
@@ -278,84 +428,78 @@ class CHWTrackerService:
     ) -> CHWLocationStats:
         """Get statistics for CHW location tracking."""
         try:
-            query = self.db.query(CHWLocationTracking).join(
-                CHWFieldVisit
-            ).filter(
-                CHWFieldVisit.chw_id == chw_id
-            )
-
+            filters = [CHWFieldVisit.chw_id == chw_id]
             if start_date:
-                query = query.filter(CHWFieldVisit.visit_date >= start_date)
+                filters.append(CHWFieldVisit.visit_date >= start_date)
             if end_date:
-                query = query.filter(CHWFieldVisit.visit_date <= end_date)
+                filters.append(CHWFieldVisit.visit_date <= end_date)
+
+            # Raw columns straight into a struct-of-arrays track, in order
+            rows = self.db.execute(
+                select(
+                    CHWLocationTracking.latitude,
+                    CHWLocationTracking.longitude,
+                    func.coalesce(CHWLocationTracking.speed, 0),
+                    CHWLocationTracking.timestamp
+                ).join(CHWFieldVisit).where(*filters)
+                .order_by(CHWLocationTracking.timestamp)
+            ).all()
+            track = np.array(
+                [tuple(row) for row in rows],
+                dtype=[("lat", "f8"), ("lon", "f8"), ("speed", "f4"), ("ts", "M8[ns]")]
+            )
 
-            locations = query.all()
-            
-            # Calculate statistics
-            total_points = len(locations)
-            total_speed = 0
-            total_distance = 0
-            visited_areas = {}
-
-            for i in range(len(locations) - 1):
-                current = locations[i]
-                next_loc = locations[i + 1]
-
-                # Calculate distance between points
-                distance = self._calculate_distance(
-                    current.latitude,
-                    current.longitude,
-                    next_loc.latitude,
-                    next_loc.longitude
-                )
-                total_distance += distance
-
-                # Add speed
-                if current.speed:
-                    total_speed += current.speed
-
-                # Track visited areas
-                area_key = f"{round(current.latitude, 3)},{round(current.longitude, 3)}"
-                visited_areas[area_key] = visited_areas.get(area_key, 0) + 1
-
-            # Sort visited areas by frequency
-            most_visited = sorted(
-                [
-                    {"location": key, "visits": value}
-                    for key, value in visited_areas.items()
-                ],
-                key=lambda x: x["visits"],
-                reverse=True
-            )[:5]
+            # Calculate statistics from the track already in memory
+            total_points = len(track)
+            total_speed = float(track["speed"].sum(dtype="f8"))
+            total_distance = self._haversine_vec(track["lat"], track["lon"])
+
+            # Visited areas are counted and ranked in the database
+            most_visited = self._most_visited_areas(filters)
 
             return CHWLocationStats(
                 total_tracking_points=total_points,
                 average_speed=total_speed / total_points if total_points > 0 else 0,
                 total_distance=total_distance,
-                coverage_area=self._calculate_coverage_area(locations),
+                coverage_area=self._calculate_coverage_area(track["lat"], track["lon"]),
                 most_visited_areas=most_visited
             )
         except Exception as e:
             logger.error(f"Error getting location stats: {str(e)}")
             raise
 
-    def _calculate_distance(
-        self,
-        lat1: float,
-        lon1: float,
-        lat2: float,
-        lon2: float
-    ) -> float:
-        """Calculate distance between two points using Haversine formula."""
+    def _most_visited_areas(self, filters: List[Any], limit: int = 5) -> List[Dict[str, Any]]:
+        """Most frequent ~100 m grid cells (coordinates rounded to 3 places)."""
+        lat = func.round(cast(CHWLocationTracking.latitude, Numeric), 3).label("lat")
+        lon = func.round(cast(CHWLocationTracking.longitude, Numeric), 3).label("lon")
+        visits = func.count().label("visits")
+
+        rows = self.db.execute(
+            select(lat, lon, visits)
+            .join(CHWFieldVisit).where(*filters)
+            .group_by(lat, lon)
+            .order_by(desc(visits))
+            .limit(limit)
+        ).all()
+        return [
+            {"location": f"{float(row.lat)},{float(row.lon)}", "visits": row.visits}
+            for row in rows
+        ]
+
+    def _haversine_vec(self, lats: np.ndarray, lons: np.ndarray) -> float:
+        """Total Haversine distance in km along a track of points, in order."""
+        if len(lats) < 2:
+            return 0.0
+
         R = 6371  # Earth's radius in kilometers
 
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        lats = np.radians(lats)
+        lons = np.radians(lons)
+        dlat = np.diff(lats)
+        dlon = np.diff(lons)
 
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        return R * c
+        a = np.sin(dlat / 2) ** 2 + np.cos(lats[:-1]) * np.cos(lats[1:]) * np.sin(dlon / 2) ** 2
+        return float(2 * R * np.arcsin(np.sqrt(a)).sum())
 
     def _calculate_total_distance(self, visits: List[CHWFieldVisit]) -> float:
         """Calculate total distance traveled during visits."""
@@ -366,28 +510,30 @@ class CHWTrackerService:
                     visit.location_tracking,
                     key=lambda x: x.timestamp
                 )
-                for i in range(len(locations) - 1):
-                    total_distance += self._calculate_distance(
-                        locations[i].latitude,
-                        locations[i].longitude,
-                        locations[i + 1].latitude,
-                        locations[i + 1].longitude
-                    )
+                total_distance += self._haversine_vec(
+                    np.array([loc.latitude for loc in locations], dtype=float),
+                    np.array([loc.longitude for loc in locations], dtype=float)
+                )
         return total_distance
 
-    def _calculate_coverage_area(self, locations: List[CHWLocationTracking]) -> float:
-        """Calculate the area covered by CHW movements."""
-        if not locations:
+    def _calculate_coverage_area(self, lats: np.ndarray, lons: np.ndarray) -> float:
+        """Calculate the area (km²) covered by CHW movements as a convex hull."""
+        if len(lats) < 3:
             return 0
 
-        # Create a convex hull of points
-        points = [(loc.latitude, loc.longitude) for loc in locations]
-        
-        # Calculate area using shoelace formula
-        area = 0
-        for i in range(len(points)):
-            j = (i + 1) % len(points)
-            area += points[i][0] * points[j][1]
-            area -= points[j][0] * points[i][1]
-        
-        return abs(area) / 2 
\ No newline at end of file
+        points = np.column_stack((lats, lons))
+
+        # Project onto a local equirectangular plane so the hull area is in km²
+        km_per_degree = 111.32
+        mean_lat = np.radians(points[:, 0].mean())
+        projected = np.column_stack((
+            points[:, 0] * km_per_degree,
+            points[:, 1] * km_per_degree * np.cos(mean_lat)
+        ))
+
+        try:
+            # For 2-D input ConvexHull.volume is the enclosed area
+            return float(ConvexHull(projected).volume)
+        except QhullError:
+            # All points coincide or lie on a line
+            return 0
\ No newline at end of file
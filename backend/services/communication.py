@@ -1,9 +1,19 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from functools import lru_cache
+import asyncio
+import re
 import httpx
 from ..config import settings
 from ..models.communication import MessageType, Message
 from ..crud.communication import mark_message_sent, mark_message_delivered, mark_message_failed
 
+_PLACEHOLDER = re.compile(r"\{([^{}]+)\}")
+
+@lru_cache(maxsize=512)
+def _compile_template(content: str) -> Tuple[str, ...]:
+    """Split template content into literal text and placeholder names, alternating."""
+    return tuple(_PLACEHOLDER.split(content))
+
 class CommunicationService:
     def __init__(self):
         self.whatsapp_api_key = settings.WHATSAPP_API_KEY
@@ -12,72 +22,82 @@ class CommunicationService:
         self.whatsapp_api_url = settings.WHATSAPP_API_URL
         self.sms_api_url = settings.SMS_API_URL
         self.voice_api_url = settings.VOICE_API_URL
+        # One pooled client for all providers so sends reuse open connections
+        self._client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=200)
+        )
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        await self._client.aclose()
 
     async def send_whatsapp_message(self, message: Message) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.whatsapp_api_url}/messages",
-                    json={
-                        "to": message.recipient,
-                        "template": {
-                            "name": message.template.name,
-                            "language": message.template.language,
-                            "components": [
-                                {
-                                    "type": "body",
-                                    "parameters": [
-                                        {"type": "text", "text": value}
-                                        for value in message.variables.values()
-                                    ]
-                                }
-                            ]
-                        }
-                    },
-                    headers={"Authorization": f"Bearer {self.whatsapp_api_key}"}
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._client.post(
+                f"{self.whatsapp_api_url}/messages",
+                json={
+                    "to": message.recipient,
+                    "template": {
+                        "name": message.template.name,
+                        "language": message.template.language,
+                        "components": [
+                            {
+                                "type": "body",
+                                "parameters": [
+                                    {"type": "text", "text": value}
+                                    for value in message.variables.values()
+                                ]
+                            }
+                        ]
+                    }
+                },
+                headers={"Authorization": f"Bearer {self.whatsapp_api_key}"}
+            )
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             raise Exception(f"Failed to send WhatsApp message: {str(e)}")
 
     async def send_sms_message(self, message: Message) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.sms_api_url}/messages",
-                    json={
-                        "to": message.recipient,
-                        "message": self._format_message_content(message),
-                    },
-                    headers={"Authorization": f"Bearer {self.sms_api_key}"}
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._client.post(
+                f"{self.sms_api_url}/messages",
+                json={
+                    "to": message.recipient,
+                    "message": self._format_message_content(message),
+                },
+                headers={"Authorization": f"Bearer {self.sms_api_key}"}
+            )
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             raise Exception(f"Failed to send SMS message: {str(e)}")
 
     async def send_voice_message(self, message: Message) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.voice_api_url}/calls",
-                    json={
-                        "to": message.recipient,
-                        "message": self._format_message_content(message),
-                    },
-                    headers={"Authorization": f"Bearer {self.voice_api_key}"}
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._client.post(
+                f"{self.voice_api_url}/calls",
+                json={
+                    "to": message.recipient,
+                    "message": self._format_message_content(message),
+                },
+                headers={"Authorization": f"Bearer {self.voice_api_key}"}
+            )
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             raise Exception(f"Failed to send voice message: {str(e)}")
 
     def _format_message_content(self, message: Message) -> str:
-        content = message.template.content
-        for key, value in message.variables.items():
-            content = content.replace(f"{{{key}}}", value)
-        return content
+        parts = _compile_template(message.template.content)
+        variables = message.variables or {}
+        # Odd indexes are placeholder names; unknown ones are left as written
+        return "".join(
+            part if i % 2 == 0 else str(variables.get(part, f"{{{part}}}"))
+            for i, part in enumerate(parts)
+        )
 
     async def send_message(self, message: Message) -> Dict[str, Any]:
         try:
@@ -101,4 +121,28 @@ class CommunicationService:
                 "error": str(e)
             }
 
+    async def send_messages(
+        self,
+        messages: List[Message],
+        concurrency: int = 32
+    ) -> List[Dict[str, Any]]:
+        """Send a batch of messages concurrently, at most `concurrency` in flight.
+
+        Results are returned in the same order as `messages`.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send_one(message: Message) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.send_message(message)
+
+        results = await asyncio.gather(
+            *(send_one(message) for message in messages),
+            return_exceptions=True
+        )
+        return [
+            {"success": False, "error": str(result)} if isinstance(result, BaseException) else result
+            for result in results
+        ]
+
 communication_service = CommunicationService() 
\ No newline at end of file
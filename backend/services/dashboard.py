@@ -1,7 +1,10 @@
 from typing import Dict, Any, Optional, List, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import or_, func, select, insert, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from types import MappingProxyType
 import logging
 
 from ..models.dashboard import (
@@ -10,39 +13,70 @@ from ..models.dashboard import (
 )
 from ..models.appointment import Appointment, AppointmentStatus
 from ..models.response import PatientResponse, ResponseStatus
+from ..models.reminder import Reminder
 from ..models.follow_up import FollowUp, FollowUpStatus
+from ..schemas.dashboard import DashboardStats
+from ..cache import cached, invalidate_key
+from ..database import commit_keep_loaded
 
 logger = logging.getLogger(__name__)
 
+# Redis namespace for per-user dashboard stats; polled far more than written
+DASHBOARD_STATS_CACHE = "dashboard:stats"
+
+def _db_utcnow(db: Session, days_ago: int = 0):
+    """Current UTC time (naive, like the stored columns) evaluated by the database.
+
+    Keeps the clock out of the bind parameters so the statement text and
+    parameters stay identical across calls and prepared plans can be reused.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        now = func.timezone("UTC", func.now())
+        if days_ago:
+            now = now - literal_column(f"interval '{int(days_ago)} days'")
+        return now
+    # SQLite's CURRENT_TIMESTAMP / datetime('now') are already UTC
+    if days_ago:
+        return func.datetime("now", f"-{int(days_ago)} days")
+    return func.now()
+
+# Default widget layout, built once at import and shared read-only
+_DEFAULT_WIDGETS = MappingProxyType({
+    DashboardWidgetType.APPOINTMENT_STATS: MappingProxyType({
+        "title": "Appointment Statistics",
+        "size": "medium",
+        "position": 0
+    }),
+    DashboardWidgetType.PATIENT_RESPONSES: MappingProxyType({
+        "title": "Patient Responses",
+        "size": "medium",
+        "position": 1
+    }),
+    DashboardWidgetType.FOLLOW_UPS: MappingProxyType({
+        "title": "Follow-ups",
+        "size": "medium",
+        "position": 2
+    }),
+    DashboardWidgetType.PERFORMANCE_METRICS: MappingProxyType({
+        "title": "Performance Metrics",
+        "size": "large",
+        "position": 3
+    }),
+    DashboardWidgetType.STAFF_SCHEDULE: MappingProxyType({
+        "title": "Staff Schedule",
+        "size": "medium",
+        "position": 4
+    })
+})
+
+# Pre-built insert kwargs for the defaults; only user_id varies per call
+_DEFAULT_WIDGET_ROWS = tuple(
+    {"widget_type": widget_type, "is_active": True, **config}
+    for widget_type, config in _DEFAULT_WIDGETS.items()
+)
+
 class DashboardService:
-    def __init__(self):
-        self.default_widgets = {
-            DashboardWidgetType.APPOINTMENT_STATS: {
-                "title": "Appointment Statistics",
-                "size": "medium",
-                "position": 0
-            },
-            DashboardWidgetType.PATIENT_RESPONSES: {
-                "title": "Patient Responses",
-                "size": "medium",
-                "position": 1
-            },
-            DashboardWidgetType.FOLLOW_UPS: {
-                "title": "Follow-ups",
-                "size": "medium",
-                "position": 2
-            },
-            DashboardWidgetType.PERFORMANCE_METRICS: {
-                "title": "Performance Metrics",
-                "size": "large",
-                "position": 3
-            },
-            DashboardWidgetType.STAFF_SCHEDULE: {
-                "title": "Staff Schedule",
-                "size": "medium",
-                "position": 4
-            }
-        }
+    _DEFAULT_WIDGETS = _DEFAULT_WIDGETS
 
     async def initialize_user_dashboard(
         self,
@@ -50,22 +84,13 @@ class DashboardService:
         user_id: int
     ) -> List[DashboardWidget]:
         """Initialize dashboard with default widgets for a new user."""
-        widgets = []
-        for widget_type, config in self.default_widgets.items():
-            widget = DashboardWidget(
-                user_id=user_id,
-                widget_type=widget_type,
-                title=config["title"],
-                position=config["position"],
-                size=config["size"],
-                is_active=True
-            )
-            db.add(widget)
-            widgets.append(widget)
-        
-        db.commit()
-        for widget in widgets:
-            db.refresh(widget)
+        rows = [{"user_id": user_id, **row} for row in _DEFAULT_WIDGET_ROWS]
+        # One multi-row INSERT ... RETURNING instead of add/refresh per widget
+        widgets = db.execute(
+            insert(DashboardWidget).returning(DashboardWidget),
+            rows
+        ).scalars().all()
+        commit_keep_loaded(db)
         return widgets
 
     async def get_user_widgets(
@@ -88,8 +113,7 @@ class DashboardService:
         """Create a new dashboard widget."""
         widget = DashboardWidget(user_id=user_id, **widget_data)
         db.add(widget)
-        db.commit()
-        db.refresh(widget)
+        commit_keep_loaded(db)
         return widget
 
     async def update_widget(
@@ -142,21 +166,36 @@ class DashboardService:
         availability_data: List[Dict[str, Any]]
     ) -> List[StaffAvailability]:
         """Update staff availability schedule."""
-        # Delete existing availability
+        rows = [{"user_id": user_id, **data} for data in availability_data]
+
+        # Drop days that are no longer part of the schedule
         db.query(StaffAvailability)\
-            .filter(StaffAvailability.user_id == user_id)\
-            .delete()
+            .filter(
+                StaffAvailability.user_id == user_id,
+                StaffAvailability.day_of_week.notin_([row["day_of_week"] for row in rows])
+            )\
+            .delete(synchronize_session=False)
 
-        # Create new availability records
+        # Upsert the remaining days in place instead of delete + re-insert
         availability_records = []
-        for data in availability_data:
-            availability = StaffAvailability(user_id=user_id, **data)
-            db.add(availability)
-            availability_records.append(availability)
+        if rows:
+            dialect_insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+            stmt = dialect_insert(StaffAvailability).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "day_of_week"],
+                set_={
+                    column.name: column
+                    for column in stmt.excluded
+                    if column.name not in ("id", "user_id", "day_of_week", "created_at")
+                }
+            )
+            availability_records = db.scalars(
+                stmt.returning(StaffAvailability),
+                execution_options={"populate_existing": True}
+            ).all()
 
-        db.commit()
-        for record in availability_records:
-            db.refresh(record)
+        commit_keep_loaded(db)
+        await self._invalidate_stats(user_id)
         return availability_records
 
     async def create_leave_request(
@@ -168,8 +207,8 @@ class DashboardService:
         """Create a new leave request."""
         leave = StaffLeave(user_id=user_id, **leave_data)
         db.add(leave)
-        db.commit()
-        db.refresh(leave)
+        commit_keep_loaded(db)
+        await self._invalidate_stats(user_id)
         return leave
 
     async def update_leave_request(
@@ -187,6 +226,7 @@ class DashboardService:
             setattr(leave, key, value)
 
         db.commit()
+        await self._invalidate_stats(leave.user_id)
         db.refresh(leave)
         return leave
 
@@ -213,8 +253,8 @@ class DashboardService:
         """Update a performance metric."""
         metric = PerformanceMetric(user_id=user_id, **metric_data)
         db.add(metric)
-        db.commit()
-        db.refresh(metric)
+        commit_keep_loaded(db)
+        await self._invalidate_stats(user_id)
         return metric
 
     async def get_performance_metrics(
@@ -228,9 +268,10 @@ class DashboardService:
         query = db.query(PerformanceMetric)\
             .filter(PerformanceMetric.user_id == user_id)
         
-        if start_date:
+        # Bounds may be SQL expressions (see _db_utcnow), which have no truth value
+        if start_date is not None:
             query = query.filter(PerformanceMetric.date >= start_date)
-        if end_date:
+        if end_date is not None:
             query = query.filter(PerformanceMetric.date <= end_date)
         
         return query.order_by(PerformanceMetric.date).all()
@@ -244,8 +285,8 @@ class DashboardService:
         """Create a new dashboard notification."""
         notification = DashboardNotification(user_id=user_id, **notification_data)
         db.add(notification)
-        db.commit()
-        db.refresh(notification)
+        commit_keep_loaded(db)
+        await self._invalidate_stats(user_id)
         return notification
 
     async def get_notifications(
@@ -282,55 +323,59 @@ class DashboardService:
         notification.is_read = True
         notification.read_at = datetime.utcnow()
         db.commit()
+        await self._invalidate_stats(notification.user_id)
         db.refresh(notification)
         return notification
 
+    async def _invalidate_stats(self, user_id: int) -> None:
+        """Drop the cached dashboard stats for a user after a write."""
+        await invalidate_key(DASHBOARD_STATS_CACHE, user_id)
+
+    @cached(DASHBOARD_STATS_CACHE, ttl=30, ignore=("db",))
     async def get_dashboard_stats(
         self,
         db: Session,
         user_id: int
-    ) -> Dict[str, Any]:
+    ) -> DashboardStats:
         """Get comprehensive dashboard statistics."""
-        # Get appointment statistics
-        total_appointments = db.query(Appointment)\
-            .filter(Appointment.doctor_id == user_id)\
-            .count()
-        
-        upcoming_appointments = db.query(Appointment)\
-            .filter(
-                and_(
+        # Get appointment, response and follow-up counts in one round trip
+        counts = db.execute(
+            select(
+                select(func.count(Appointment.id))
+                .where(Appointment.doctor_id == user_id)
+                .scalar_subquery()
+                .label("total_appointments"),
+                select(func.count(Appointment.id))
+                .where(
                     Appointment.doctor_id == user_id,
                     Appointment.status == AppointmentStatus.SCHEDULED,
-                    Appointment.scheduled_time >= datetime.utcnow()
+                    Appointment.scheduled_at >= _db_utcnow(db)
                 )
-            )\
-            .count()
-
-        # Get response statistics
-        pending_responses = db.query(PatientResponse)\
-            .filter(
-                and_(
+                .scalar_subquery()
+                .label("upcoming_appointments"),
+                select(func.count(PatientResponse.id))
+                .join(Reminder, PatientResponse.reminder_id == Reminder.id)
+                .where(
                     PatientResponse.status == ResponseStatus.RECEIVED,
-                    PatientResponse.reminder.has(doctor_id=user_id)
+                    Reminder.doctor_id == user_id
                 )
-            )\
-            .count()
-
-        # Get follow-up statistics
-        pending_follow_ups = db.query(FollowUp)\
-            .filter(
-                and_(
+                .scalar_subquery()
+                .label("pending_responses"),
+                select(func.count(FollowUp.id))
+                .where(
                     FollowUp.status == FollowUpStatus.PENDING,
                     FollowUp.assigned_to_id == user_id
                 )
-            )\
-            .count()
+                .scalar_subquery()
+                .label("pending_follow_ups")
+            )
+        ).one()
 
         # Get performance metrics
         metrics = await self.get_performance_metrics(
             db,
             user_id,
-            start_date=datetime.utcnow() - timedelta(days=30)
+            start_date=_db_utcnow(db, days_ago=30)
         )
         performance_metrics = {
             metric.metric_type: metric.value
@@ -355,16 +400,16 @@ class DashboardService:
             status="pending"
         )
 
-        return {
-            "total_appointments": total_appointments,
-            "upcoming_appointments": upcoming_appointments,
-            "pending_responses": pending_responses,
-            "pending_follow_ups": pending_follow_ups,
+        return DashboardStats.model_validate({
+            "total_appointments": counts.total_appointments,
+            "upcoming_appointments": counts.upcoming_appointments,
+            "pending_responses": counts.pending_responses,
+            "pending_follow_ups": counts.pending_follow_ups,
             "performance_metrics": performance_metrics,
             "recent_notifications": recent_notifications,
             "staff_availability": staff_availability,
             "leave_requests": leave_requests
-        }
+        }, from_attributes=True)
 
 # Create singleton instance
 dashboard_service = DashboardService() 
\ No newline at end of file
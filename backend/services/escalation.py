@@ -1,9 +1,12 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+from collections import defaultdict
+from functools import partial
 import logging
+import re
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from ..models.notification import Notification, NotificationTemplate
+from sqlalchemy import and_, or_, func, select
+from ..models.notification import Notification, NotificationTemplate, NotificationStatus
 from ..models.patient import Patient
 from ..models.scheduling import FollowUpSchedule, ScheduleStatus
 from ..schemas.notification import NotificationCreate
@@ -12,91 +15,127 @@ import json
 
 logger = logging.getLogger(__name__)
 
-class EscalationService:
-    def __init__(self, db: Session):
-        self.db = db
-        self.escalation_rules = self._load_escalation_rules()
-
-    def _load_escalation_rules(self) -> Dict[str, Any]:
-        """Load escalation rules from configuration"""
-        return {
-            "missed_appointment": {
-                "thresholds": [
-                    {
-                        "attempts": 1,
-                        "delay_hours": 24,
-                        "channels": ["sms", "whatsapp"],
-                        "priority": "high"
-                    },
-                    {
-                        "attempts": 2,
-                        "delay_hours": 48,
-                        "channels": ["sms", "whatsapp", "ivr"],
-                        "priority": "high"
-                    },
-                    {
-                        "attempts": 3,
-                        "delay_hours": 72,
-                        "channels": ["sms", "whatsapp", "ivr", "ussd"],
-                        "priority": "urgent",
-                        "notify_staff": True
-                    }
-                ]
+# Escalation thresholds per case type, built once at import. Rules are
+# embedded in notification metadata, so they stay plain JSON-able dicts.
+_ESCALATION_RULES: Dict[str, Any] = {
+    "missed_appointment": {
+        "thresholds": [
+            {
+                "attempts": 1,
+                "delay_hours": 24,
+                "channels": ["sms", "whatsapp"],
+                "priority": "high"
             },
-            "medication_adherence": {
-                "thresholds": [
-                    {
-                        "missed_doses": 1,
-                        "delay_hours": 12,
-                        "channels": ["sms", "whatsapp"],
-                        "priority": "medium"
-                    },
-                    {
-                        "missed_doses": 2,
-                        "delay_hours": 24,
-                        "channels": ["sms", "whatsapp", "ivr"],
-                        "priority": "high"
-                    },
-                    {
-                        "missed_doses": 3,
-                        "delay_hours": 48,
-                        "channels": ["sms", "whatsapp", "ivr", "ussd"],
-                        "priority": "urgent",
-                        "notify_staff": True
-                    }
-                ]
+            {
+                "attempts": 2,
+                "delay_hours": 48,
+                "channels": ["sms", "whatsapp", "ivr"],
+                "priority": "high"
             },
-            "test_results": {
-                "thresholds": [
-                    {
-                        "delay_hours": 24,
-                        "channels": ["sms", "whatsapp"],
-                        "priority": "high"
-                    },
-                    {
-                        "delay_hours": 48,
-                        "channels": ["sms", "whatsapp", "ivr"],
-                        "priority": "urgent",
-                        "notify_staff": True
-                    }
-                ]
+            {
+                "attempts": 3,
+                "delay_hours": 72,
+                "channels": ["sms", "whatsapp", "ivr", "ussd"],
+                "priority": "urgent",
+                "notify_staff": True
+            }
+        ]
+    },
+    "medication_adherence": {
+        "thresholds": [
+            {
+                "missed_doses": 1,
+                "delay_hours": 12,
+                "channels": ["sms", "whatsapp"],
+                "priority": "medium"
             },
-            "emergency": {
-                "thresholds": [
-                    {
-                        "delay_hours": 0,
-                        "channels": ["sms", "whatsapp", "ivr"],
-                        "priority": "urgent",
-                        "notify_staff": True,
-                        "notify_emergency": True
-                    }
-                ]
+            {
+                "missed_doses": 2,
+                "delay_hours": 24,
+                "channels": ["sms", "whatsapp", "ivr"],
+                "priority": "high"
+            },
+            {
+                "missed_doses": 3,
+                "delay_hours": 48,
+                "channels": ["sms", "whatsapp", "ivr", "ussd"],
+                "priority": "urgent",
+                "notify_staff": True
+            }
+        ]
+    },
+    "test_results": {
+        "thresholds": [
+            {
+                "delay_hours": 24,
+                "channels": ["sms", "whatsapp"],
+                "priority": "high"
+            },
+            {
+                "delay_hours": 48,
+                "channels": ["sms", "whatsapp", "ivr"],
+                "priority": "urgent",
+                "notify_staff": True
             }
-        }
+        ]
+    },
+    "emergency": {
+        "thresholds": [
+            {
+                "delay_hours": 0,
+                "channels": ["sms", "whatsapp", "ivr"],
+                "priority": "urgent",
+                "notify_staff": True,
+                "notify_emergency": True
+            }
+        ]
+    }
+}
+
+# Threshold lookups by attempt / missed-dose count
+_MISSED_BY_ATTEMPTS = {
+    rule["attempts"]: rule
+    for rule in _ESCALATION_RULES["missed_appointment"]["thresholds"]
+}
+_MEDICATION_BY_MISSED_DOSES = {
+    rule["missed_doses"]: rule
+    for rule in _ESCALATION_RULES["medication_adherence"]["thresholds"]
+}
+
+# Attempts beyond this never match a missed-appointment threshold
+_MAX_COUNTED_ATTEMPTS = max(_MISSED_BY_ATTEMPTS) + 1
+
+# Missed-appointment reply keywords, matched in one pass. Keywords match as
+# word prefixes ("confirmed", "cancelling"); "no" must be a whole word.
+_RESPONSE_KEYWORDS = re.compile(r"\b(confirm|yes|reschedule|cancel|no\b)", re.IGNORECASE)
+_RESPONSE_STATUS = {
+    "confirm": (0, ScheduleStatus.CONFIRMED),
+    "yes": (0, ScheduleStatus.CONFIRMED),
+    "reschedule": (1, ScheduleStatus.RESCHEDULED),
+    "cancel": (2, ScheduleStatus.CANCELLED),
+    "no": (2, ScheduleStatus.CANCELLED)
+}
+
+class EscalationService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.escalation_rules = _ESCALATION_RULES
+        # Rows shared by every escalation in one check_escalations pass
+        self._templates: Dict[str, Optional[NotificationTemplate]] = {}
+        self._patients: Dict[Any, Patient] = {}
+        # Work queued by one pass and flushed once at its end
+        self._pending_notifications: List[Dict[str, Any]] = []
+        self._pending_alerts: List[Callable[[], Awaitable[None]]] = []
 
     async def check_escalations(self) -> None:
         """Check for cases that need escalation"""
         try:
+            # Start each pass with fresh caches and queues
+            self._templates = {}
+            self._patients = {}
+            self._pending_notifications = []
+            self._pending_alerts = []
+
             # Check missed appointments
             await self._check_missed_appointments()
             
@@ -108,7 +147,17 @@ class EscalationService:
             
             # Check emergency cases
             await self._check_emergency_cases()
+
+            # Save every escalation notification in one bulk INSERT
+            if self._pending_notifications:
+                self.db.bulk_insert_mappings(Notification, self._pending_notifications)
+            self.db.commit()
+
+            # Alert staff/emergency services only once the escalations are saved
+            for alert in self._pending_alerts:
+                await alert()
         except Exception as e:
+            self.db.rollback()
             logger.error(f"Error checking escalations: {str(e)}")
             raise
 
@@ -116,25 +165,51 @@ class EscalationService:
         """Check for missed appointments"""
         try:
             # Get missed appointments
-            missed_appointments = self.db.query(FollowUpSchedule)\
-                .filter(FollowUpSchedule.status == ScheduleStatus.PENDING)\
-                .filter(FollowUpSchedule.start_date < datetime.utcnow())\
-                .all()
+            missed_appointments = self.db.scalars(
+                select(FollowUpSchedule).where(
+                    FollowUpSchedule.status == ScheduleStatus.PENDING,
+                    FollowUpSchedule.start_date < datetime.utcnow()
+                )
+            ).all()
+
+            # Count notification attempts for all missed appointments at once.
+            # Only counts up to one past the last threshold matter, so each
+            # appointment contributes at most that many rows to the count.
+            appointment_key = Notification.metadata["appointment_id"].astext
+            attempt_counts = defaultdict(int)
+            if missed_appointments:
+                attempts_seen = select(
+                    Notification.patient_id.label("patient_id"),
+                    appointment_key.label("appointment_id"),
+                    func.row_number().over(
+                        partition_by=(Notification.patient_id, appointment_key),
+                        order_by=Notification.id
+                    ).label("attempt")
+                ).where(
+                    Notification.metadata["type"].astext == "missed_appointment",
+                    appointment_key.in_([str(a.id) for a in missed_appointments])
+                ).subquery()
+                attempt_counts.update(
+                    ((patient_id, appointment_id), count)
+                    for patient_id, appointment_id, count in self.db.execute(
+                        select(
+                            attempts_seen.c.patient_id,
+                            attempts_seen.c.appointment_id,
+                            func.count()
+                        )
+                        .where(attempts_seen.c.attempt <= _MAX_COUNTED_ATTEMPTS)
+                        .group_by(attempts_seen.c.patient_id, attempts_seen.c.appointment_id)
+                    )
+                )
             
+            self._prefetch_patients(a.patient_id for a in missed_appointments)
+
             for appointment in missed_appointments:
                 # Get notification attempts
-                attempts = self.db.query(Notification)\
-                    .filter(Notification.patient_id == appointment.patient_id)\
-                    .filter(Notification.metadata["appointment_id"].astext == appointment.id)\
-                    .filter(Notification.metadata["type"].astext == "missed_appointment")\
-                    .count()
+                attempts = attempt_counts[(appointment.patient_id, str(appointment.id))]
                 
                 # Get applicable escalation rule
-                rule = next(
-                    (r for r in self.escalation_rules["missed_appointment"]["thresholds"]
-                     if r["attempts"] == attempts + 1),
-                    None
-                )
+                rule = _MISSED_BY_ATTEMPTS.get(attempts + 1)
                 
                 if rule:
                     # Create escalation notification
@@ -176,10 +251,15 @@ class EscalationService:
         """Check for emergency cases"""
         try:
             # Get emergency notifications
-            emergency_notifications = self.db.query(Notification)\
-                .filter(Notification.metadata["type"].astext == "emergency")\
-                .filter(Notification.status == "pending")\
-                .all()
+            emergency_notifications = self.db.scalars(
+                select(Notification)
+                .where(
+                    Notification.metadata["type"].astext == "emergency",
+                    Notification.status == NotificationStatus.PENDING
+                )
+            ).all()
+
+            self._prefetch_patients(n.patient_id for n in emergency_notifications)
             
             for notification in emergency_notifications:
                 # Get escalation rule
@@ -199,6 +279,26 @@ class EscalationService:
             logger.error(f"Error checking emergency cases: {str(e)}")
             raise
 
+    def _template(self, escalation_type: str) -> Optional[NotificationTemplate]:
+        """Active template for an escalation type, fetched at most once per pass."""
+        if escalation_type not in self._templates:
+            self._templates[escalation_type] = self.db.scalars(
+                select(NotificationTemplate).where(
+                    NotificationTemplate.type == escalation_type,
+                    NotificationTemplate.is_active == True
+                ).limit(1)
+            ).first()
+        return self._templates[escalation_type]
+
+    def _prefetch_patients(self, patient_ids) -> None:
+        """Load the given patients in one query, skipping ones already cached."""
+        missing = set(patient_ids) - self._patients.keys()
+        if missing:
+            self._patients.update(
+                (patient.id, patient)
+                for patient in self.db.scalars(select(Patient).where(Patient.id.in_(missing)))
+            )
+
     async def _create_escalation_notification(
         self,
         patient_id: str,
@@ -208,23 +308,23 @@ class EscalationService:
     ) -> None:
         """Create escalation notification"""
         try:
-            # Get patient
-            patient = self.db.query(Patient).filter(Patient.id == patient_id).first()
+            # Get patient, from this pass's prefetch when possible
+            patient = self._patients.get(patient_id)
+            if patient is None:
+                patient = self.db.get(Patient, patient_id)
             if not patient:
                 logger.error(f"Patient not found: {patient_id}")
                 return
             
             # Get notification template
-            template = self.db.query(NotificationTemplate)\
-                .filter(NotificationTemplate.type == escalation_type)\
-                .filter(NotificationTemplate.is_active == True)\
-                .first()
+            template = self._template(escalation_type)
             
             if not template:
                 logger.error(f"Template not found for type: {escalation_type}")
                 return
             
-            # Create notifications for each channel
+            # Create notifications for each channel, all due at the same time
+            scheduled_at = datetime.utcnow() + timedelta(hours=rule["delay_hours"])
             for channel in rule["channels"]:
                 notification = NotificationCreate(
                     patient_id=patient_id,
@@ -232,7 +332,7 @@ class EscalationService:
                     template_id=template.id,
                     priority=rule["priority"],
                     status="pending",
-                    scheduled_at=datetime.utcnow() + timedelta(hours=rule["delay_hours"]),
+                    scheduled_at=scheduled_at,
                     metadata={
                         "type": escalation_type,
                         "escalation_rule": rule,
@@ -240,18 +340,20 @@ class EscalationService:
                     }
                 )
                 
-                # Save notification
-                self.db.add(Notification(**notification.dict()))
+                # Queue notification for the end-of-pass bulk insert
+                self._pending_notifications.append(notification.dict())
             
             # Notify staff if required
             if rule.get("notify_staff"):
-                await self._notify_staff(patient_id, escalation_type, metadata)
+                self._pending_alerts.append(
+                    partial(self._notify_staff, patient_id, escalation_type, metadata)
+                )
             
             # Notify emergency services if required
             if rule.get("notify_emergency"):
-                await self._notify_emergency(patient_id, metadata)
-            
-            self.db.commit()
+                self._pending_alerts.append(
+                    partial(self._notify_emergency, patient_id, metadata)
+                )
         except Exception as e:
             logger.error(f"Error creating escalation notification: {str(e)}")
             raise
@@ -340,14 +442,14 @@ class EscalationService:
                 logger.error(f"Appointment not found: {appointment_id}")
                 return
             
-            # Update appointment status based on response
-            response = notification.response.lower()
-            if "confirm" in response or "yes" in response:
-                appointment.status = ScheduleStatus.CONFIRMED
-            elif "reschedule" in response:
-                appointment.status = ScheduleStatus.RESCHEDULED
-            elif "cancel" in response or "no" in response:
-                appointment.status = ScheduleStatus.CANCELLED
+            # Update appointment status based on response; when several
+            # keywords appear, confirm beats reschedule beats cancel
+            matched = [
+                _RESPONSE_STATUS[keyword.lower()]
+                for keyword in _RESPONSE_KEYWORDS.findall(notification.response or "")
+            ]
+            if matched:
+                appointment.status = min(matched)[1]
         except Exception as e:
             logger.error(f"Error handling missed appointment response: {str(e)}")
             raise
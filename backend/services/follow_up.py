@@ -1,12 +1,17 @@
 from typing import List, Optional, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import select, update
+from ..database import commit_keep_loaded
 from ..models.follow_up import FollowUpSchedule, FollowUpStatus
 from ..models.appointment import Appointment, AppointmentStatus
 from ..schemas.follow_up import FollowUpCreate, FollowUpUpdate
 from ..services.notification import notification_service
 
+# Upper bound on reminder sends in flight at once
+REMINDER_SEND_WORKERS = 8
+
 class FollowUpService:
     def create_follow_up(
         self,
@@ -37,35 +42,50 @@ class FollowUpService:
         follow_up_id: int
     ) -> Optional[FollowUpSchedule]:
         """Get a follow-up schedule by ID."""
-        return db.query(FollowUpSchedule).filter(FollowUpSchedule.id == follow_up_id).first()
+        return db.get(FollowUpSchedule, follow_up_id)
 
     def get_patient_follow_ups(
         self,
         db: Session,
         patient_id: int,
-        skip: int = 0,
+        after_id: Optional[int] = None,
         limit: int = 100
-    ) -> List[FollowUpSchedule]:
-        """Get all follow-ups for a patient."""
-        return db.query(FollowUpSchedule)\
-            .filter(FollowUpSchedule.patient_id == patient_id)\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+    ) -> Tuple[List[FollowUpSchedule], Optional[int]]:
+        """Get a page of follow-ups for a patient, plus the cursor for the next page."""
+        return self._follow_up_page(
+            db, FollowUpSchedule.patient_id == patient_id, after_id, limit
+        )
 
     def get_doctor_follow_ups(
         self,
         db: Session,
         doctor_id: int,
-        skip: int = 0,
+        after_id: Optional[int] = None,
         limit: int = 100
-    ) -> List[FollowUpSchedule]:
-        """Get all follow-ups for a doctor."""
-        return db.query(FollowUpSchedule)\
-            .filter(FollowUpSchedule.doctor_id == doctor_id)\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+    ) -> Tuple[List[FollowUpSchedule], Optional[int]]:
+        """Get a page of follow-ups for a doctor, plus the cursor for the next page."""
+        return self._follow_up_page(
+            db, FollowUpSchedule.doctor_id == doctor_id, after_id, limit
+        )
+
+    def _follow_up_page(
+        self,
+        db: Session,
+        criterion,
+        after_id: Optional[int],
+        limit: int
+    ) -> Tuple[List[FollowUpSchedule], Optional[int]]:
+        """Keyset page ordered by id: rows after ``after_id`` and the last id returned.
+
+        Unlike OFFSET, the cost does not grow with page depth. The cursor is
+        None once a short page shows there is nothing further.
+        """
+        query = select(FollowUpSchedule).where(criterion)
+        if after_id is not None:
+            query = query.where(FollowUpSchedule.id > after_id)
+        follow_ups = db.scalars(query.order_by(FollowUpSchedule.id).limit(limit)).all()
+        next_after_id = follow_ups[-1].id if len(follow_ups) == limit else None
+        return follow_ups, next_after_id
 
     def update_follow_up(
         self,
@@ -74,20 +94,26 @@ class FollowUpService:
         follow_up: FollowUpUpdate
     ) -> Optional[FollowUpSchedule]:
         """Update a follow-up schedule with conflict checking."""
-        db_follow_up = self.get_follow_up(db, follow_up_id)
-        if not db_follow_up:
-            return None
-
         update_data = follow_up.dict(exclude_unset=True)
         
         # Check for conflicts if time is being updated
         if "scheduled_date" in update_data or "duration_minutes" in update_data:
-            start_time = update_data.get("scheduled_date", db_follow_up.scheduled_date)
-            duration = update_data.get("duration_minutes", db_follow_up.duration_minutes)
+            current = db.execute(
+                select(
+                    FollowUpSchedule.doctor_id,
+                    FollowUpSchedule.scheduled_date,
+                    FollowUpSchedule.duration_minutes
+                ).where(FollowUpSchedule.id == follow_up_id)
+            ).first()
+            if not current:
+                return None
+
+            start_time = update_data.get("scheduled_date", current.scheduled_date)
+            duration = update_data.get("duration_minutes", current.duration_minutes)
             
             is_available, conflicts = self.check_availability(
                 db=db,
-                doctor_id=db_follow_up.doctor_id,
+                doctor_id=current.doctor_id,
                 start_time=start_time,
                 duration_minutes=duration,
                 exclude_follow_up_id=follow_up_id
@@ -96,11 +122,18 @@ class FollowUpService:
             if not is_available:
                 raise ValueError(f"Time slot conflicts with existing schedules: {conflicts}")
 
-        for field, value in update_data.items():
-            setattr(db_follow_up, field, value)
+        if not update_data:
+            return self.get_follow_up(db, follow_up_id)
 
-        db.commit()
-        db.refresh(db_follow_up)
+        # One targeted UPDATE ... RETURNING instead of load, setattr and refresh
+        db_follow_up = db.scalars(
+            update(FollowUpSchedule)
+            .where(FollowUpSchedule.id == follow_up_id)
+            .values(**update_data)
+            .returning(FollowUpSchedule),
+            execution_options={"populate_existing": True}
+        ).first()
+        commit_keep_loaded(db)
         return db_follow_up
 
     def delete_follow_up(
@@ -123,16 +156,15 @@ class FollowUpService:
         days: int = 7
     ) -> List[FollowUpSchedule]:
         """Get all upcoming follow-ups within the specified number of days."""
-        end_date = datetime.utcnow() + timedelta(days=days)
-        return db.query(FollowUpSchedule)\
-            .filter(
-                and_(
-                    FollowUpSchedule.scheduled_date >= datetime.utcnow(),
-                    FollowUpSchedule.scheduled_date <= end_date,
-                    FollowUpSchedule.status == FollowUpStatus.SCHEDULED
-                )
-            )\
-            .all()
+        now = datetime.utcnow()
+        end_date = now + timedelta(days=days)
+        return db.scalars(
+            select(FollowUpSchedule).where(
+                FollowUpSchedule.scheduled_date >= now,
+                FollowUpSchedule.scheduled_date <= end_date,
+                FollowUpSchedule.status == FollowUpStatus.SCHEDULED
+            )
+        ).all()
 
     def send_follow_up_reminders(
         self,
@@ -141,41 +173,59 @@ class FollowUpService:
     ) -> List[Dict[str, Any]]:
         """Send reminders for upcoming follow-ups."""
         reminder_date = datetime.utcnow() + timedelta(days=days_before)
-        follow_ups = db.query(FollowUpSchedule)\
-            .filter(
-                and_(
-                    FollowUpSchedule.scheduled_date.date() == reminder_date.date(),
-                    FollowUpSchedule.status == FollowUpStatus.SCHEDULED,
-                    FollowUpSchedule.reminder_sent == False
-                )
-            )\
-            .all()
+        # Half-open day range keeps the scheduled_date index usable
+        day_start = reminder_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = day_start + timedelta(days=1)
+        follow_ups = db.scalars(
+            select(FollowUpSchedule).where(
+                FollowUpSchedule.scheduled_date >= day_start,
+                FollowUpSchedule.scheduled_date < day_end,
+                FollowUpSchedule.status == FollowUpStatus.SCHEDULED,
+                FollowUpSchedule.reminder_sent == False
+            )
+        ).all()
+
+        # Send the reminders concurrently; each send is blocking network I/O
+        futures = []
+        if follow_ups:
+            with ThreadPoolExecutor(max_workers=min(REMINDER_SEND_WORKERS, len(follow_ups))) as executor:
+                futures = [
+                    executor.submit(
+                        notification_service.send_follow_up_reminder,
+                        patient_id=follow_up.patient_id,
+                        follow_up_id=follow_up.id,
+                        scheduled_date=follow_up.scheduled_date
+                    )
+                    for follow_up in follow_ups
+                ]
 
         results = []
-        for follow_up in follow_ups:
-            try:
-                # Send notification
-                notification_service.send_follow_up_reminder(
-                    patient_id=follow_up.patient_id,
-                    follow_up_id=follow_up.id,
-                    scheduled_date=follow_up.scheduled_date
-                )
-                
-                # Update reminder status
-                follow_up.reminder_sent = True
-                db.commit()
-                
+        sent_ids = []
+        for follow_up, future in zip(follow_ups, futures):
+            error = future.exception()
+            if error is None:
+                sent_ids.append(follow_up.id)
                 results.append({
                     "follow_up_id": follow_up.id,
                     "status": "success"
                 })
-            except Exception as e:
+            else:
                 results.append({
                     "follow_up_id": follow_up.id,
                     "status": "error",
-                    "error": str(e)
+                    "error": str(error)
                 })
 
+        # Flag every sent reminder with one UPDATE and commit
+        if sent_ids:
+            db.execute(
+                update(FollowUpSchedule)
+                .where(FollowUpSchedule.id.in_(sent_ids))
+                .values(reminder_sent=True)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
         return results
 
     def check_availability(
@@ -189,44 +239,35 @@ class FollowUpService:
         """Check if a time slot is available for a follow-up."""
         end_time = start_time + timedelta(minutes=duration_minutes)
         
-        # Check for conflicts with other follow-ups
-        follow_up_query = db.query(FollowUpSchedule).filter(
-            and_(
-                FollowUpSchedule.doctor_id == doctor_id,
-                FollowUpSchedule.status == FollowUpStatus.SCHEDULED,
-                or_(
-                    and_(
-                        FollowUpSchedule.scheduled_date <= start_time,
-                        FollowUpSchedule.scheduled_date + func.interval(f"{FollowUpSchedule.duration_minutes} minutes") > start_time
-                    ),
-                    and_(
-                        FollowUpSchedule.scheduled_date < end_time,
-                        FollowUpSchedule.scheduled_date + func.interval(f"{FollowUpSchedule.duration_minutes} minutes") >= end_time
-                    )
-                )
-            )
+        # Check for conflicts with other follow-ups; only the slot columns are needed
+        follow_up_query = select(
+            FollowUpSchedule.id,
+            FollowUpSchedule.scheduled_date,
+            FollowUpSchedule.duration_minutes
+        ).where(
+            FollowUpSchedule.doctor_id == doctor_id,
+            FollowUpSchedule.status == FollowUpStatus.SCHEDULED,
+            # Half-open overlap: [scheduled_date, end_time) meets [start_time, end_time)
+            FollowUpSchedule.scheduled_date < end_time,
+            FollowUpSchedule.end_time > start_time
         )
         
         if exclude_follow_up_id:
-            follow_up_query = follow_up_query.filter(FollowUpSchedule.id != exclude_follow_up_id)
+            follow_up_query = follow_up_query.where(FollowUpSchedule.id != exclude_follow_up_id)
         
-        follow_up_conflicts = follow_up_query.all()
+        follow_up_conflicts = db.execute(follow_up_query).all()
         
         # Check for conflicts with appointments
-        appointment_conflicts = db.query(Appointment).filter(
-            and_(
+        appointment_conflicts = db.execute(
+            select(
+                Appointment.id,
+                Appointment.start_time,
+                Appointment.end_time
+            ).where(
                 Appointment.doctor_id == doctor_id,
                 Appointment.status == AppointmentStatus.SCHEDULED,
-                or_(
-                    and_(
-                        Appointment.start_time <= start_time,
-                        Appointment.end_time > start_time
-                    ),
-                    and_(
-                        Appointment.start_time < end_time,
-                        Appointment.end_time >= end_time
-                    )
-                )
+                Appointment.start_time < end_time,
+                Appointment.end_time > start_time
             )
         ).all()
         
@@ -262,19 +303,57 @@ class FollowUpService:
         available_slots = []
         current_time = date.replace(hour=start_hour, minute=0, second=0, microsecond=0)
         end_time = date.replace(hour=end_hour, minute=0, second=0, microsecond=0)
-        
-        while current_time + timedelta(minutes=duration_minutes) <= end_time:
-            is_available, _ = self.check_availability(
-                db=db,
-                doctor_id=doctor_id,
-                start_time=current_time,
-                duration_minutes=duration_minutes
+        day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        # Load the doctor's busy intervals for the day once, then sweep the
+        # candidate slots against them instead of querying per slot
+        busy_follow_ups = db.execute(
+            select(
+                FollowUpSchedule.scheduled_date,
+                FollowUpSchedule.duration_minutes
+            ).where(
+                FollowUpSchedule.doctor_id == doctor_id,
+                FollowUpSchedule.status == FollowUpStatus.SCHEDULED,
+                FollowUpSchedule.scheduled_date >= day_start,
+                FollowUpSchedule.scheduled_date < end_time
             )
+        ).all()
+        busy_appointments = db.execute(
+            select(
+                Appointment.start_time,
+                Appointment.end_time
+            ).where(
+                Appointment.doctor_id == doctor_id,
+                Appointment.status == AppointmentStatus.SCHEDULED,
+                Appointment.start_time < end_time,
+                Appointment.end_time > current_time
+            )
+        ).all()
+        busy = sorted(
+            [(start, start + timedelta(minutes=duration)) for start, duration in busy_follow_ups]
+            + [(start, end) for start, end in busy_appointments]
+        )
+
+        first_busy = 0
+        while current_time + timedelta(minutes=duration_minutes) <= end_time:
+            slot_end = current_time + timedelta(minutes=duration_minutes)
+
+            # Slots only move forward, so intervals that ended are done with
+            while first_busy < len(busy) and busy[first_busy][1] <= current_time:
+                first_busy += 1
+
+            is_available = True
+            for busy_start, busy_end in busy[first_busy:]:
+                if busy_start >= slot_end:
+                    break
+                if busy_end > current_time:
+                    is_available = False
+                    break
             
             if is_available:
                 available_slots.append({
                     "start_time": current_time,
-                    "end_time": current_time + timedelta(minutes=duration_minutes)
+                    "end_time": slot_end
                 })
             
             current_time += timedelta(minutes=30)  # Check every 30 minutes
@@ -296,17 +375,16 @@ class FollowUpService:
             patient_id=follow_up.patient_id,
             doctor_id=follow_up.doctor_id,
             start_time=follow_up.scheduled_date,
-            end_time=follow_up.scheduled_date + timedelta(minutes=follow_up.duration_minutes),
+            end_time=follow_up.end_time,
             status=AppointmentStatus.SCHEDULED,
             follow_up_id=follow_up_id,
             notes=f"Converted from follow-up: {follow_up.notes}" if follow_up.notes else None
         )
         
         db.add(appointment)
-        db.commit()
-        db.refresh(appointment)
         
-        # Update follow-up status
+        # Update follow-up status in the same transaction; the INSERT
+        # returns the appointment id, so no refresh is needed afterwards
         follow_up.status = FollowUpStatus.COMPLETED
         db.commit()
         
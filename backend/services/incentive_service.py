@@ -1,12 +1,17 @@
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+import logging
 from sqlalchemy.orm import Session
-from ..models.incentives import Incentive, IncentiveRule, IncentivePayment
+from sqlalchemy import func, select, text, bindparam, and_
+from sqlalchemy.engine import Row
+from ..models.incentives import Incentive, IncentiveRule, IncentivePayment, IncentiveType
 from ..models.analytics import (
     MessageDeliveryMetrics,
     NHIFClaimMetrics,
     PatientEngagementMetrics,
-    FacilityPerformanceMetrics
+    FacilityPerformanceMetrics,
+    FACILITY_DAILY_INCENTIVE_VIEW,
+    facility_daily_incentive
 )
 from ..crud import incentives as incentive_crud
 from ..schemas.incentives import (
@@ -15,9 +20,219 @@ from ..schemas.incentives import (
     IncentivePaymentCreate
 )
 
+logger = logging.getLogger(__name__)
+
+# Incentive types with a calculator below; their rules are loaded together
+CALCULATED_INCENTIVE_TYPES = (
+    IncentiveType.PERFORMANCE,
+    IncentiveType.ATTENDANCE,
+    IncentiveType.PATIENT_SATISFACTION,
+    IncentiveType.QUALITY_CARE
+)
+
+# Metric aggregates for a (facility, window), built once at import so each
+# call reuses the compiled SQL from the engine's statement cache. The live
+# statements take {"fid", "start", "end", "skip_start", "skip_end"} and leave
+# out [skip_start, skip_end), the whole days answered by the roll-up view;
+# pass skip_start == skip_end to read the whole window live.
+_ROLLUP_COLUMNS = (
+    "performance_rows", "total_appointments", "completed_appointments",
+    "engagement_rows", "satisfaction_sum", "satisfaction_count",
+    "claim_rows", "total_claims", "approved_claims"
+)
+
+_ROLLUP_TOTALS = select(*(
+    func.coalesce(func.sum(facility_daily_incentive.c[name]), 0).label(name)
+    for name in _ROLLUP_COLUMNS
+)).where(
+    facility_daily_incentive.c.facility_id == bindparam("fid"),
+    facility_daily_incentive.c.day >= bindparam("start"),
+    facility_daily_incentive.c.day < bindparam("end")
+)
+
+_ROLLUP_REFRESHED_AT = select(facility_daily_incentive.c.refreshed_at).limit(1)
+
+def _live_window(date_column):
+    """Filter for [start, end] minus the days read from the roll-up view."""
+    return (
+        date_column >= bindparam("start"),
+        date_column <= bindparam("end"),
+        ~and_(date_column >= bindparam("skip_start"), date_column < bindparam("skip_end"))
+    )
+
+_PERFORMANCE_METRICS = select(
+    func.count(),
+    func.coalesce(func.sum(FacilityPerformanceMetrics.total_appointments), 0),
+    func.coalesce(func.sum(FacilityPerformanceMetrics.completed_appointments), 0)
+).where(
+    FacilityPerformanceMetrics.facility_id == bindparam("fid"),
+    *_live_window(FacilityPerformanceMetrics.date)
+)
+
+_SATISFACTION_METRICS = select(
+    func.count(),
+    func.coalesce(func.sum(PatientEngagementMetrics.patient_satisfaction_score), 0),
+    func.count(PatientEngagementMetrics.patient_satisfaction_score)
+).where(
+    PatientEngagementMetrics.facility_id == bindparam("fid"),
+    *_live_window(PatientEngagementMetrics.date)
+)
+
+_CLAIM_METRICS = select(
+    func.count(),
+    func.coalesce(func.sum(NHIFClaimMetrics.total_claims), 0),
+    func.coalesce(func.sum(NHIFClaimMetrics.approved_claims), 0)
+).where(
+    NHIFClaimMetrics.facility_id == bindparam("fid"),
+    *_live_window(NHIFClaimMetrics.date)
+)
+
+_NO_ROLLUP = dict.fromkeys(_ROLLUP_COLUMNS, 0)
+
+def _start_of_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
 class IncentiveService:
     def __init__(self, db: Session):
         self.db = db
+        # Active rules per (facility_id, start_date, end_date), keyed by type
+        self._rules: Dict[Tuple[int, datetime, datetime], Dict[IncentiveType, IncentiveRule]] = {}
+        # Roll-up totals per (facility_id, first_day, end_day)
+        self._totals: Dict[Tuple[int, datetime, datetime], Dict[str, Any]] = {}
+        # Start of the day the roll-up view was last refreshed; read once
+        self._cutoff: Optional[datetime] = None
+
+    def _load_rules(
+        self,
+        facility_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[IncentiveType, IncentiveRule]:
+        """Applicable rules for every calculated incentive type, in one query.
+
+        The result is kept for the service's lifetime, so computing several
+        incentives for the same facility and period reads the rules once.
+        """
+        key = (facility_id, start_date, end_date)
+        if key not in self._rules:
+            rules = {}
+            for rule in self.db.query(IncentiveRule).filter(
+                IncentiveRule.facility_id == facility_id,
+                IncentiveRule.incentive_type.in_(CALCULATED_INCENTIVE_TYPES),
+                IncentiveRule.is_active == True,
+                IncentiveRule.start_date <= end_date,
+                IncentiveRule.end_date >= start_date
+            ).order_by(IncentiveRule.id):
+                rules.setdefault(rule.incentive_type, rule)
+            self._rules[key] = rules
+        return self._rules[key]
+
+    def _use_rollup(self) -> bool:
+        """Whether metrics come from the daily roll-up view (PostgreSQL only)."""
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def _rollup_days(self, start_date: datetime, end_date: datetime) -> Tuple[datetime, datetime]:
+        """The whole days of [start_date, end_date] the roll-up view can answer.
+
+        Only days that ended before the view's last refresh qualify; partial
+        days at either end of the window and anything newer are read from the
+        metric tables. Returns an empty range when no day qualifies.
+        """
+        if self._cutoff is None:
+            refreshed_at = self.db.scalar(_ROLLUP_REFRESHED_AT) if self._use_rollup() else None
+            self._cutoff = _start_of_day(refreshed_at) if refreshed_at else datetime.min
+        first_day = _start_of_day(start_date)
+        if first_day < start_date:
+            first_day += timedelta(days=1)
+        end_day = min(_start_of_day(end_date), self._cutoff)
+        if first_day >= end_day:
+            return start_date, start_date
+        return first_day, end_day
+
+    def _window_metrics(
+        self,
+        statement,
+        facility_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Tuple[Dict[str, Any], Row]:
+        """Roll-up totals and live aggregates that together cover a window."""
+        skip_start, skip_end = self._rollup_days(start_date, end_date)
+        rollup = _NO_ROLLUP
+        if skip_start < skip_end:
+            key = (facility_id, skip_start, skip_end)
+            if key not in self._totals:
+                self._totals[key] = self.db.execute(
+                    _ROLLUP_TOTALS, {"fid": facility_id, "start": skip_start, "end": skip_end}
+                ).one()._asdict()
+            rollup = self._totals[key]
+        live = self.db.execute(statement, {
+            "fid": facility_id,
+            "start": start_date,
+            "end": end_date,
+            "skip_start": skip_start,
+            "skip_end": skip_end
+        }).one()
+        return rollup, live
+
+    def _performance_metrics(
+        self,
+        facility_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Tuple[int, int, int]:
+        """Metric row count, total and completed appointments for a window."""
+        rollup, (rows, total_appointments, completed_appointments) = self._window_metrics(
+            _PERFORMANCE_METRICS, facility_id, start_date, end_date
+        )
+        return (
+            rows + rollup["performance_rows"],
+            total_appointments + rollup["total_appointments"],
+            completed_appointments + rollup["completed_appointments"]
+        )
+
+    def _satisfaction_metrics(
+        self,
+        facility_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Tuple[int, Optional[float]]:
+        """Metric row count and average satisfaction score for a window."""
+        rollup, (rows, satisfaction_sum, satisfaction_count) = self._window_metrics(
+            _SATISFACTION_METRICS, facility_id, start_date, end_date
+        )
+        satisfaction_sum += rollup["satisfaction_sum"]
+        satisfaction_count += rollup["satisfaction_count"]
+        avg_satisfaction = satisfaction_sum / satisfaction_count if satisfaction_count else None
+        return rows + rollup["engagement_rows"], avg_satisfaction
+
+    def _claim_metrics(
+        self,
+        facility_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Tuple[int, int, int]:
+        """Metric row count, total and approved NHIF claims for a window."""
+        rollup, (rows, total_claims, approved_claims) = self._window_metrics(
+            _CLAIM_METRICS, facility_id, start_date, end_date
+        )
+        return (
+            rows + rollup["claim_rows"],
+            total_claims + rollup["total_claims"],
+            approved_claims + rollup["approved_claims"]
+        )
+
+    def refresh_incentive_views(self) -> None:
+        """Refresh the daily incentive roll-up without blocking readers."""
+        if not self._use_rollup():
+            return
+        try:
+            self.db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {FACILITY_DAILY_INCENTIVE_VIEW}"))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error refreshing incentive views: {str(e)}")
+            raise
 
     def calculate_performance_incentive(
         self,
@@ -28,28 +243,18 @@ class IncentiveService:
     ) -> Optional[Incentive]:
         """Calculate performance-based incentive for a user."""
         # Get performance metrics
-        metrics = self.db.query(FacilityPerformanceMetrics).filter(
-            FacilityPerformanceMetrics.facility_id == facility_id,
-            FacilityPerformanceMetrics.date >= start_date,
-            FacilityPerformanceMetrics.date <= end_date
-        ).all()
+        metric_days, total_appointments, completed_appointments = self._performance_metrics(
+            facility_id, start_date, end_date
+        )
 
-        if not metrics:
+        if not metric_days:
             return None
 
-        # Calculate total appointments and completion rate
-        total_appointments = sum(m.total_appointments for m in metrics)
-        completed_appointments = sum(m.completed_appointments for m in metrics)
+        # Calculate completion rate
         completion_rate = (completed_appointments / total_appointments * 100) if total_appointments > 0 else 0
 
         # Get applicable incentive rule
-        rule = self.db.query(IncentiveRule).filter(
-            IncentiveRule.facility_id == facility_id,
-            IncentiveRule.incentive_type == "performance",
-            IncentiveRule.is_active == True,
-            IncentiveRule.start_date <= end_date,
-            IncentiveRule.end_date >= start_date
-        ).first()
+        rule = self._load_rules(facility_id, start_date, end_date).get(IncentiveType.PERFORMANCE)
 
         if not rule:
             return None
@@ -98,13 +303,7 @@ class IncentiveService:
         attendance_rate = 95.0  # This should come from your attendance tracking system
 
         # Get applicable incentive rule
-        rule = self.db.query(IncentiveRule).filter(
-            IncentiveRule.facility_id == facility_id,
-            IncentiveRule.incentive_type == "attendance",
-            IncentiveRule.is_active == True,
-            IncentiveRule.start_date <= end_date,
-            IncentiveRule.end_date >= start_date
-        ).first()
+        rule = self._load_rules(facility_id, start_date, end_date).get(IncentiveType.ATTENDANCE)
 
         if not rule:
             return None
@@ -145,27 +344,18 @@ class IncentiveService:
     ) -> Optional[Incentive]:
         """Calculate patient satisfaction-based incentive for a user."""
         # Get patient satisfaction metrics
-        metrics = self.db.query(PatientEngagementMetrics).filter(
-            PatientEngagementMetrics.facility_id == facility_id,
-            PatientEngagementMetrics.date >= start_date,
-            PatientEngagementMetrics.date <= end_date
-        ).all()
+        metric_days, avg_satisfaction = self._satisfaction_metrics(
+            facility_id, start_date, end_date
+        )
 
-        if not metrics:
+        if not metric_days:
             return None
 
-        # Calculate average satisfaction score
-        total_score = sum(m.patient_satisfaction_score for m in metrics)
-        avg_satisfaction = total_score / len(metrics)
+        # Average satisfaction score, computed by the database
+        avg_satisfaction = float(avg_satisfaction or 0)
 
         # Get applicable incentive rule
-        rule = self.db.query(IncentiveRule).filter(
-            IncentiveRule.facility_id == facility_id,
-            IncentiveRule.incentive_type == "patient_satisfaction",
-            IncentiveRule.is_active == True,
-            IncentiveRule.start_date <= end_date,
-            IncentiveRule.end_date >= start_date
-        ).first()
+        rule = self._load_rules(facility_id, start_date, end_date).get(IncentiveType.PATIENT_SATISFACTION)
 
         if not rule:
             return None
@@ -206,28 +396,18 @@ class IncentiveService:
     ) -> Optional[Incentive]:
         """Calculate quality care-based incentive for a user."""
         # Get NHIF claim metrics
-        metrics = self.db.query(NHIFClaimMetrics).filter(
-            NHIFClaimMetrics.facility_id == facility_id,
-            NHIFClaimMetrics.date >= start_date,
-            NHIFClaimMetrics.date <= end_date
-        ).all()
+        metric_days, total_claims, approved_claims = self._claim_metrics(
+            facility_id, start_date, end_date
+        )
 
-        if not metrics:
+        if not metric_days:
             return None
 
         # Calculate claim approval rate
-        total_claims = sum(m.total_claims for m in metrics)
-        approved_claims = sum(m.approved_claims for m in metrics)
         approval_rate = (approved_claims / total_claims * 100) if total_claims > 0 else 0
 
         # Get applicable incentive rule
-        rule = self.db.query(IncentiveRule).filter(
-            IncentiveRule.facility_id == facility_id,
-            IncentiveRule.incentive_type == "quality_care",
-            IncentiveRule.is_active == True,
-            IncentiveRule.start_date <= end_date,
-            IncentiveRule.end_date >= start_date
-        ).first()
+        rule = self._load_rules(facility_id, start_date, end_date).get(IncentiveType.QUALITY_CARE)
 
         if not rule:
             return None
@@ -1,7 +1,7 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc
+from sqlalchemy import func, and_, or_, desc, case
 import logging
 
 from ..models.incentives import (
@@ -318,25 +318,26 @@ class IncentivesService:
     async def get_reward_stats(self, chw_id: int) -> RewardStats:
         """Get reward statistics for a CHW."""
         try:
-            rewards = self.db.query(Reward).filter(Reward.chw_id == chw_id).all()
-            
-            total_rewards = len(rewards)
+            # One row per reward type, aggregated by the database
+            rows = self.db.query(
+                Reward.reward_type,
+                func.count(),
+                func.coalesce(func.sum(Reward.amount), 0),
+                func.sum(case((Reward.status == "distributed", 1), else_=0))
+            ).filter(
+                Reward.chw_id == chw_id
+            ).group_by(Reward.reward_type).all()
+
+            total_rewards = 0
             rewards_by_type = {}
             total_value = 0
             distributed = 0
 
-            for reward in rewards:
-                # Count by type
-                reward_type = reward.reward_type.value
-                rewards_by_type[reward_type] = rewards_by_type.get(reward_type, 0) + 1
-
-                # Calculate total value
-                if reward.amount:
-                    total_value += reward.amount
-
-                # Count distributed rewards
-                if reward.status == "distributed":
-                    distributed += 1
+            for reward_type, count, value, distributed_count in rows:
+                rewards_by_type[reward_type.value] = count
+                total_rewards += count
+                total_value += value
+                distributed += distributed_count
 
             return RewardStats(
                 total_rewards=total_rewards,
@@ -351,29 +352,42 @@ class IncentivesService:
     async def get_achievement_stats(self, chw_id: int) -> AchievementStats:
         """Get achievement statistics for a CHW."""
         try:
-            achievements = self.db.query(Achievement).filter(
+            # Completion time in hours, computed by the database
+            if self.db.get_bind().dialect.name == "postgresql":
+                completion_hours = func.extract(
+                    "epoch", Achievement.completed_at - Achievement.created_at
+                ) / 3600
+            else:
+                completion_hours = (
+                    func.julianday(Achievement.completed_at)
+                    - func.julianday(Achievement.created_at)
+                ) * 24
+            is_completed = and_(
+                Achievement.is_completed == True,
+                Achievement.completed_at.isnot(None)
+            )
+
+            # One row per achievement type; hours are summed rather than
+            # averaged so the overall average stays exact across types
+            rows = self.db.query(
+                Achievement.achievement_type,
+                func.count(),
+                func.sum(case((is_completed, 1), else_=0)),
+                func.coalesce(func.sum(case((is_completed, completion_hours), else_=None)), 0)
+            ).filter(
                 Achievement.chw_id == chw_id
-            ).all()
-            
-            total_achievements = len(achievements)
+            ).group_by(Achievement.achievement_type).all()
+
+            total_achievements = 0
             completed_achievements = 0
             achievements_by_type = {}
             total_completion_time = 0
 
-            for achievement in achievements:
-                # Count by type
-                achievement_type = achievement.achievement_type.value
-                achievements_by_type[achievement_type] = achievements_by_type.get(
-                    achievement_type, 0
-                ) + 1
-
-                # Count completed achievements
-                if achievement.is_completed and achievement.completed_at:
-                    completed_achievements += 1
-                    completion_time = (
-                        achievement.completed_at - achievement.created_at
-                    ).total_seconds() / 3600  # Convert to hours
-                    total_completion_time += completion_time
+            for achievement_type, count, completed, completion_time in rows:
+                achievements_by_type[achievement_type.value] = count
+                total_achievements += count
+                completed_achievements += completed
+                total_completion_time += float(completion_time)
 
             return AchievementStats(
                 total_achievements=total_achievements,
@@ -394,40 +408,44 @@ class IncentivesService:
     ) -> AdherenceStats:
         """Get adherence statistics for a CHW's patients."""
         try:
-            query = self.db.query(AdherenceTracking).filter(
-                AdherenceTracking.chw_id == chw_id
-            )
-
+            filters = [AdherenceTracking.chw_id == chw_id]
             if start_date:
-                query = query.filter(AdherenceTracking.created_at >= start_date)
+                filters.append(AdherenceTracking.created_at >= start_date)
             if end_date:
-                query = query.filter(AdherenceTracking.created_at <= end_date)
+                filters.append(AdherenceTracking.created_at <= end_date)
 
-            tracking_records = query.all()
-            
-            total_patients = len(set(record.patient_id for record in tracking_records))
+            # One row per status, aggregated by the database
+            rows = self.db.query(
+                AdherenceTracking.status,
+                func.count(),
+                func.coalesce(func.sum(AdherenceTracking.adherence_rate), 0)
+            ).filter(*filters).group_by(AdherenceTracking.status).all()
+
+            # Patients can appear under several statuses, so count them once
+            total_patients = self.db.query(
+                func.count(func.distinct(AdherenceTracking.patient_id))
+            ).filter(*filters).scalar()
+
+            total_records = 0
             status_distribution = {}
             total_adherence_rate = 0
             compliant_count = 0
 
-            for record in tracking_records:
-                # Count by status
-                status = record.status.value
-                status_distribution[status] = status_distribution.get(status, 0) + 1
-
-                # Calculate adherence rate
-                if record.adherence_rate:
-                    total_adherence_rate += record.adherence_rate
+            for status, count, adherence_rate in rows:
+                if status is not None:
+                    status_distribution[status.value] = count
+                total_records += count
+                total_adherence_rate += adherence_rate
 
-                if record.status == AdherenceStatus.COMPLIANT:
-                    compliant_count += 1
+                if status == AdherenceStatus.COMPLIANT:
+                    compliant_count = count
 
             return AdherenceStats(
                 total_patients=total_patients,
                 compliance_rate=compliant_count / total_patients if total_patients > 0 else 0,
                 status_distribution=status_distribution,
-                average_adherence_rate=total_adherence_rate / len(tracking_records)
-                if tracking_records else 0
+                average_adherence_rate=total_adherence_rate / total_records
+                if total_records else 0
             )
         except Exception as e:
             logger.error(f"Error getting adherence stats: {str(e)}")
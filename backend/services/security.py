@@ -15,7 +15,7 @@ from ..schemas.security import (
     PermissionCreate, PermissionUpdate,
     APIKeyCreate, APIKeyUpdate,
     AuditLogCreate, SecurityPolicyCreate,
-    SecurityPolicyUpdate
+    SecurityPolicyUpdate, audit_log_list_adapter
 )
 
 logger = logging.getLogger(__name__)
@@ -407,7 +407,9 @@ class SecurityService:
                 "total_audit_logs": total_audit_logs,
                 "audit_logs_by_action": audit_logs_by_action,
                 "audit_logs_by_status": audit_logs_by_status,
-                "recent_audit_logs": recent_logs,
+                "recent_audit_logs": audit_log_list_adapter.validate_python(
+                    recent_logs, from_attributes=True
+                ),
                 "security_policies": security_policies,
                 "role_distribution": role_distribution,
                 "permission_distribution": permission_distribution
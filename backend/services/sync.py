@@ -25,7 +25,8 @@ from ..models.caregiver import Caregiver
 from ..schemas.sync import (
     SyncRequest, SyncResponse, SyncStats,
     SyncQueueCreate, SyncStatusCreate, DeviceInfoCreate,
-    SyncConflictCreate, OfflineCacheCreate
+    SyncConflictCreate, OfflineCacheCreate, SyncConflictResponse,
+    sync_conflict_list_adapter
 )
 
 logger = logging.getLogger(__name__)
@@ -233,14 +234,16 @@ class SyncService:
             logger.error(f"Error getting changes for device: {str(e)}")
             raise
 
-    async def _get_device_conflicts(self, device_id: str) -> List[Dict[str, Any]]:
+    async def _get_device_conflicts(self, device_id: str) -> List[SyncConflictResponse]:
         """Get conflicts for device."""
         try:
             conflicts = self.db.query(SyncConflict).filter(
                 SyncConflict.device_id == device_id,
                 SyncConflict.resolved_at == None
             ).all()
-            return [self._format_conflict(conflict) for conflict in conflicts]
+            return sync_conflict_list_adapter.validate_python(
+                conflicts, from_attributes=True
+            )
 
         except Exception as e:
             logger.error(f"Error getting device conflicts: {str(e)}")
@@ -345,17 +348,6 @@ class SyncService:
             "created_at": change.created_at.isoformat()
         }
 
-    def _format_conflict(self, conflict: SyncConflict) -> Dict[str, Any]:
-        """Format a conflict for response."""
-        return {
-            "id": conflict.id,
-            "record_type": conflict.record_type,
-            "record_id": conflict.record_id,
-            "server_version": conflict.server_version,
-            "client_version": conflict.client_version,
-            "created_at": conflict.created_at.isoformat()
-        }
-
     async def queue_sync(
         self,
         db: Session,
@@ -30,14 +30,14 @@ class SyncService:
             # Get pending messages
             pending_messages = crud.get_pending_messages(db)
             
-            for message in pending_messages:
+            # Send the whole batch concurrently
+            results = await communication_service.send_messages(pending_messages)
+
+            sent_ids = []
+            for message, result in zip(pending_messages, results):
                 try:
-                    # Attempt to send message
-                    result = await communication_service.send_message(message)
-                    
                     if result["success"]:
-                        # Update message status
-                        crud.mark_message_sent(db, message.id)
+                        sent_ids.append(message.id)
                         
                         # If we have a message ID from the provider, store it
                         if "message_id" in result:
@@ -57,6 +57,9 @@ class SyncService:
                     # Log error and continue with next message
                     print(f"Error syncing message {message.id}: {str(e)}")
                     continue
+
+            # Update message status for all sent messages in one statement
+            crud.mark_messages_sent(db, sent_ids)
         finally:
             db.close()
 
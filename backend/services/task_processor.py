@@ -4,6 +4,8 @@ from sqlalchemy.orm import Session
 from ..database import SessionLocal
 from .. import crud
 from .notification import notification_service
+from .chw_tracker import CHWTrackerService
+from .incentive_service import IncentiveService
 
 class TaskProcessor:
     def __init__(self):
@@ -18,7 +20,9 @@ class TaskProcessor:
             asyncio.create_task(self.process_reminders()),
             asyncio.create_task(self.generate_daily_reports()),
             asyncio.create_task(self.cleanup_old_records()),
-            asyncio.create_task(self.check_upcoming_appointments())
+            asyncio.create_task(self.check_upcoming_appointments()),
+            asyncio.create_task(self.refresh_stats_views()),
+            asyncio.create_task(self.refresh_incentive_views())
         ]
         await asyncio.gather(*self.tasks)
     
@@ -164,6 +168,35 @@ class TaskProcessor:
                 print(f"Error checking upcoming appointments: {str(e)}")
                 await asyncio.sleep(60)
 
+    async def refresh_stats_views(self):
+        """Refresh materialized statistics views"""
+        while self.running:
+            try:
+                CHWTrackerService(self.db).refresh_stats_views()
+                
+                # Wait for 10 minutes before next refresh
+                await asyncio.sleep(600)
+            except Exception as e:
+                print(f"Error refreshing stats views: {str(e)}")
+                await asyncio.sleep(60)
+
+    async def refresh_incentive_views(self):
+        """Refresh the incentive roll-up view nightly"""
+        last_refresh = None
+        while self.running:
+            try:
+                # Refresh once a day from 1 AM, ahead of the daily reports
+                now = datetime.now()
+                if now.hour >= 1 and last_refresh != now.date():
+                    IncentiveService(self.db).refresh_incentive_views()
+                    last_refresh = now.date()
+                
+                # Wait for 1 minute before next check
+                await asyncio.sleep(60)
+            except Exception as e:
+                print(f"Error refreshing incentive views: {str(e)}")
+                await asyncio.sleep(60)
+
 # Create singleton instance
 task_processor = TaskProcessor()
 